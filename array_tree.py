@@ -0,0 +1,161 @@
+"""
+A game tree stored as parallel arrays
+
+Rather than a Python object per node, an ArrayTree keeps each field of
+every node in its own array, so a node costs ArrayTree.node_bytes() bytes
+instead of a few hundred, and a search can hold tens of millions of them.
+"""
+from array import array
+from typing import Any, Optional
+
+# A node's score before it is scored
+UNSCORED = -128
+# The bits of the key stored for each node
+KEY_MASK = (1 << 64) - 1
+
+
+def state_key(state: Any) -> int:
+    """
+    Return the 64-bit key of state: the Zobrist hash of a Stonehenge state,
+    and otherwise its hash().
+    >>> from stonehenge import StonehengeState
+    >>> state = StonehengeState(True, 2).make_move("A")
+    >>> state_key(state) == state.zobrist
+    True
+    """
+    zobrist = getattr(state, "zobrist", None)
+    return (hash(state) if zobrist is None else zobrist) & KEY_MASK
+
+
+class ArrayTree:
+    """
+    A game tree whose nodes are indices into parallel arrays. The children
+    of a node are added together, so they are the consecutive nodes from
+    its first child, in the order of its state's get_possible_moves().
+
+    parent - the index of each node's parent, or -1 for a root
+    first_child - the index of each node's first child, or -1 for none
+    child_count - each node's number of children
+    score - each node's score for the player to move, or UNSCORED
+    move - the index of the move into each node among its parent's
+           get_possible_moves()
+    key - the state_key() of each node's state
+    """
+    parent: array
+    first_child: array
+    child_count: array
+    score: array
+    move: array
+    key: array
+
+    def __init__(self) -> None:
+        """
+        Initialize an ArrayTree with no nodes.
+        """
+        self.parent = array('q')
+        self.first_child = array('q')
+        self.child_count = array('H')
+        self.score = array('b')
+        self.move = array('H')
+        self.key = array('Q')
+
+    def __len__(self) -> int:
+        """
+        Return the number of nodes in this ArrayTree.
+        """
+        return len(self.parent)
+
+    def node_bytes(self) -> int:
+        """
+        Return the bytes the arrays of this ArrayTree take for each node.
+        >>> ArrayTree().node_bytes()
+        29
+        """
+        return sum(column.itemsize for column in self._columns())
+
+    def add(self, parent: int, move: int, key: int,
+            score: Optional[int] = None) -> int:
+        """
+        Add a node with no children below parent (-1 for a root), reached
+        by the move at index move, and return its index. Adding the first
+        child of parent records it as parent's first child.
+        >>> tree = ArrayTree()
+        >>> root = tree.add(-1, 0, 7)
+        >>> [tree.add(root, move, 10 + move, -1) for move in range(3)]
+        [1, 2, 3]
+        >>> list(tree.children(root)), tree.score[2], tree.key[3]
+        ([1, 2, 3], -1, 12)
+        """
+        index = len(self.parent)
+        self.parent.append(parent)
+        self.first_child.append(-1)
+        self.child_count.append(0)
+        self.score.append(UNSCORED if score is None else score)
+        self.move.append(move)
+        self.key.append(key)
+        if parent >= 0:
+            if self.child_count[parent] == 0:
+                self.first_child[parent] = index
+            self.child_count[parent] += 1
+        return index
+
+    def children(self, node: int) -> range:
+        """
+        Return the indices of node's children.
+        """
+        first = self.first_child[node]
+        return range(first, first + self.child_count[node])
+
+    def prune(self, node: int) -> None:
+        """
+        Remove node's children, which must be, with their descendants, the
+        last nodes added, and everything added after them.
+        >>> tree = ArrayTree()
+        >>> root = tree.add(-1, 0, 0)
+        >>> child = tree.add(root, 0, 1)
+        >>> _ = tree.add(child, 0, 2), tree.add(child, 1, 3)
+        >>> tree.prune(child)
+        >>> len(tree), list(tree.children(child))
+        (2, [])
+        """
+        first = self.first_child[node]
+        if first >= 0:
+            for column in self._columns():
+                del column[first:]
+            self.first_child[node] = -1
+            self.child_count[node] = 0
+
+    def graft(self, node: int, subtree: 'ArrayTree') -> None:
+        """
+        Add the nodes of subtree below its root, node 0, as descendants of
+        node, which must have no children; subtree's root stands for node.
+        >>> subtree = ArrayTree()
+        >>> _ = subtree.add(-1, 0, 1)
+        >>> _ = subtree.add(0, 0, 2, 1), subtree.add(0, 1, 3, -1)
+        >>> _ = subtree.add(1, 0, 4, -1)
+        >>> tree = ArrayTree()
+        >>> root = tree.add(-1, 0, 0)
+        >>> node = tree.add(root, 0, 1)
+        >>> tree.graft(node, subtree)
+        >>> [tree.key[i] for i in tree.children(node)]
+        [2, 3]
+        >>> [tree.key[i] for i in tree.children(tree.first_child[node])]
+        [4]
+        """
+        offset = len(self) - 1
+        for i in range(1, len(subtree)):
+            parent = subtree.parent[i]
+            self.add(node if parent == 0 else parent + offset,
+                     subtree.move[i], subtree.key[i], subtree.score[i])
+
+    def _columns(self) -> list:
+        """
+        Return the arrays of this ArrayTree.
+        """
+        return [self.parent, self.first_child, self.child_count, self.score,
+                self.move, self.key]
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
@@ -0,0 +1,182 @@
+"""
+Evaluating many Stonehenge positions at once with NumPy
+
+NumPy is optional: without it BatchEvaluator scores positions one at a
+time with rough_outcome(), giving the same results more slowly.
+"""
+from typing import Any, List, Tuple
+from game_state import GameState
+from stonehenge import get_topology
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Positions evaluated together; each needs a few cells x leylines and
+# cells x cells arrays
+BATCH_SIZE = 4096
+# Moves batch_search_strategy looks ahead before evaluating the frontier
+BATCH_DEPTH = 3
+
+
+class BatchEvaluator:
+    """
+    Works out the captured leylines, whether the game is over and the
+    rough_outcome() of a batch of positions on a board of one size.
+
+    board_size - the size of the board of the positions
+    membership - a cells x leylines matrix of which cells are on which
+                 leyline, if NumPy is available
+    sizes - the number of cells on each leyline, if NumPy is available
+    """
+    board_size: int
+    membership: Any
+    sizes: Any
+
+    def __init__(self, board_size: int) -> None:
+        """
+        Initialize a BatchEvaluator for boards of board_size.
+        >>> evaluator = BatchEvaluator(1)
+        >>> evaluator.membership is None or \\
+        ...     evaluator.membership.tolist() == [[1, 0, 1, 0, 0, 1],
+        ...                                       [1, 0, 0, 1, 1, 0],
+        ...                                       [0, 1, 0, 1, 0, 1]]
+        True
+        """
+        self.board_size = board_size
+        self._topology = get_topology(board_size)
+        self.membership, self.sizes = None, None
+        if numpy is not None:
+            topology = self._topology
+            self.membership = numpy.array(
+                [[mask >> cell & 1 for mask in topology.leylines]
+                 for cell in range(len(topology.labels))], dtype=numpy.int16)
+            self.sizes = numpy.array(topology.leyline_sizes,
+                                     dtype=numpy.int16)
+
+    def encode(self, states: List[Any]) -> Tuple[Any, Any, Any]:
+        """
+        Return states as a positions x cells array of claims (0 for a free
+        cell, 1 for p1 and 2 for p2), a positions x leylines array of
+        leyline owners in the same form, and an array of whether p1 is to
+        move. Needs NumPy.
+        """
+        keys = numpy.array([state.get_position_key()[1:] for state in states],
+                           dtype=numpy.int64).reshape(-1, 5)
+        cell_bits = numpy.arange(len(self._topology.labels))
+        line_bits = numpy.arange(len(self._topology.leylines))
+        cells = (keys[:, 1, None] >> cell_bits & 1) + \
+            2*(keys[:, 2, None] >> cell_bits & 1)
+        lines = (keys[:, 3, None] >> line_bits & 1) + \
+            2*(keys[:, 4, None] >> line_bits & 1)
+        return (cells.astype(numpy.int8), lines.astype(numpy.int8),
+                keys[:, 0].astype(bool))
+
+    def evaluate_arrays(self, cells: Any, lines: Any,
+                        p1_turn: Any) -> Tuple[Any, Any, Any, Any]:
+        """
+        Return the number of leylines captured by p1 and by p2, whether the
+        game is over, and the rough_outcome() for the player to move, as
+        arrays over the positions encoded as encode() returns them.
+
+        The rough outcome follows StonehengeTopology.rough_outcome(): the
+        first free cell, in label order, that captures enough leylines to
+        win gives WIN, or LOSE if some reply to it does, and otherwise it
+        is the fraction of leylines captured.
+        """
+        total = len(self._topology.leylines)
+        mover = numpy.where(p1_turn, 1, 2)[:, None]
+        free = cells == 0
+        mine, theirs = cells == mover, cells == 3 - mover
+        p1_count = (lines == 1).sum(1)
+        p2_count = (lines == 2).sum(1)
+        my_count = numpy.where(p1_turn, p1_count, p2_count)
+        their_count = numpy.where(p1_turn, p2_count, p1_count)
+        over = (p1_count*2 >= total) | (p2_count*2 >= total)
+        unclaimed = lines == 0
+        my_capture = self._captures(mine, free, unclaimed)
+        their_capture = self._captures(theirs, free, unclaimed)
+        wins = free & ((my_count[:, None] + my_capture.sum(2))*2 >= total)
+        need = (total + 1) // 2 - their_count
+        # What each reply would capture, less the leylines the move before
+        # it already took
+        their_capture = their_capture.astype(numpy.float32)
+        replies = their_capture.sum(2)[:, None, :] - \
+            my_capture.astype(numpy.float32) @ their_capture.transpose(0, 2, 1)
+        replies[:, numpy.arange(cells.shape[1]),
+                numpy.arange(cells.shape[1])] = 0
+        loses = free & (replies >= need[:, None, None]).any(2)
+        decisive = wins | loses
+        first = decisive.argmax(1)
+        rows = numpy.arange(cells.shape[0])
+        outcome = numpy.where(wins[rows, first], GameState.WIN,
+                              GameState.LOSE)
+        outcome = numpy.where(decisive.any(1), outcome, 0)
+        outcome[over | ~free.any(1)] = GameState.LOSE
+        return p1_count, p2_count, over, outcome
+
+    def _captures(self, player, free, unclaimed):
+        """
+        Return a positions x cells x leylines array of the leylines each
+        free cell would capture for the player holding the cells player.
+        """
+        on_line = player.astype(numpy.int16) @ self.membership
+        threatened = unclaimed & ((on_line + 1)*2 >= self.sizes)
+        return free[:, :, None] & self.membership.astype(bool)[None] & \
+            threatened[:, None, :]
+
+    def evaluate(self, states: List[Any]) -> List[float]:
+        """
+        Return the rough_outcome() of each of states.
+        >>> from stonehenge import BitboardStonehengeState
+        >>> state = BitboardStonehengeState(True, 2)
+        >>> states = [state, state.make_move("A"),
+        ...           state.make_move("A").make_move("B")]
+        >>> BatchEvaluator(2).evaluate(states)
+        [0.0, -1, 1]
+        """
+        if numpy is None:
+            return [state.rough_outcome() for state in states]
+        total = len(self._topology.leylines)
+        outcomes = []
+        for start in range(0, len(states), BATCH_SIZE):
+            cells, lines, p1_turn = self.encode(states[start:start+BATCH_SIZE])
+            p1_count, p2_count, _, outcome = self.evaluate_arrays(
+                cells, lines, p1_turn)
+            my_count = numpy.where(p1_turn, p1_count, p2_count)
+            outcomes.extend(code if code else count / total for code, count
+                            in zip(outcome.tolist(), my_count.tolist()))
+        return outcomes
+
+
+def batch_search_strategy(game: Any, depth: int = BATCH_DEPTH) -> Any:
+    """
+    Return the first move of game.current_state with the best score found
+    looking depth (at least 1) moves ahead. The tree is expanded one level
+    at a time, the whole frontier is scored with one
+    BatchEvaluator.evaluate() call, and positions where the game is over
+    before the frontier score LOSE for the player to move.
+    >>> from stonehenge import BitboardStonehengeGame
+    >>> batch_search_strategy(BitboardStonehengeGame(True, 2))
+    'A'
+    """
+    state = game.current_state
+    if state.get_possible_moves() == []:
+        return None
+    levels = [[state]]
+    children = []
+    for _ in range(depth):
+        level, spans = [], []
+        for parent in levels[-1]:
+            start = len(level)
+            level.extend(parent.make_move(move)
+                         for move in parent.get_possible_moves())
+            spans.append((start, len(level)))
+        levels.append(level)
+        children.append(spans)
+    scores = BatchEvaluator(state.board_size).evaluate(levels[-1])
+    for spans in reversed(children[1:]):
+        scores = [max(-1*score for score in scores[start:end])
+                  if start < end else state.LOSE for start, end in spans]
+    scores = [-1*score for score in scores]
+    return state.get_possible_moves()[scores.index(max(scores))]
@@ -0,0 +1,256 @@
+"""
+Timing comparisons between the strategies, run without game_interface
+
+Run "python benchmark.py suite" for the full strategy benchmark, which
+prints one JSON record per strategy and position, or "parallel" or
+"ordering" for the smaller comparisons.
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from stonehenge import StonehengeGame, BitboardStonehengeGame
+from strategy import TABLE, SOLVED, MINIMAX_TREE, INFINITY, MoveOrderer, \
+    go_through, rough_outcome_strategy, minimax_recursive_strategy, \
+    minimax_parallel_strategy
+from game_wrapper import GameWrapper
+from mcts import TREE as MCTS_TREE
+from registry import STRATEGIES, MAX_EMPTY_BOARD, UNCOUNTED
+
+# Mid-game positions, as a board size and the moves played from an empty
+# board with p1 to move. Keep these fixed so results compare across
+# releases.
+CORPUS = [(2, "DB"), (2, "FE"), (3, "EDIG"), (3, "IDJG"),
+          (4, "NRGEKPHM"), (4, "CHQRNMDL"), (5, "GOBNYRTEHQKJLF")]
+
+# Openings that leave the player to move lost, so that every reply has to
+# be refuted and move ordering matters most
+ORDERING_OPENINGS = {2: ["A"], 3: ["A"], 4: ["A", "R", "J"]}
+
+
+class NodeCounter(GameWrapper):
+    """
+    Wraps a game for a search, counting the positions searched (each one
+    is checked with is_over exactly once)
+    """
+    def __init__(self, game):
+        """
+        Initialize a NodeCounter for game with no positions counted.
+        """
+        GameWrapper.__init__(self, game)
+        self.nodes = 0
+
+    def is_over(self, state):
+        """
+        Return whether game is over at state, counting state.
+        """
+        self.nodes += 1
+        return GameWrapper.is_over(self, state)
+
+
+def clear_search_state():
+    """
+    Empty the shared transposition table and drop the search trees the
+    strategies keep between moves, so that the next search starts cold.
+    >>> MCTS_TREE.root = MINIMAX_TREE.root = 0
+    >>> clear_search_state()
+    >>> len(TABLE), MINIMAX_TREE.root, MCTS_TREE.root
+    (0, None, None)
+    """
+    TABLE.clear()
+    MINIMAX_TREE.root = None
+    MCTS_TREE.root = None
+
+
+def time_move(strategy, game, *args):
+    """
+    Return the move strategy picks for game and the seconds it took,
+    starting from clear_search_state().
+    >>> game = StonehengeGame(True, 1)
+    >>> time_move(minimax_recursive_strategy, game)[0]
+    'A'
+    """
+    clear_search_state()
+    start = time.perf_counter()
+    move = without_solved(strategy, game, *args)
+    return move, time.perf_counter() - start
+
+
+def without_solved(strategy, game, *args):
+    """
+    Return the move strategy picks for game with the solved-position
+    databases set aside, so that the minimax strategies search.
+    """
+    solved = dict(SOLVED)
+    SOLVED.clear()
+    try:
+        return strategy(game, *args)
+    finally:
+        SOLVED.update(solved)
+
+
+def parallel_speedup(board_sizes=(2, 3), workers=None):
+    """
+    Print how much faster minimax_parallel_strategy is than
+    minimax_recursive_strategy for each board size in board_sizes, with
+    both Stonehenge state classes, on an empty board and after p1 claims
+    A (a lost position, so every reply has to be searched).
+    """
+    args = () if workers is None else (workers,)
+    for board_size in board_sizes:
+        for game_class in (StonehengeGame, BitboardStonehengeGame):
+            for opening in ([], ["A"]):
+                game = game_class(True, board_size)
+                for move in opening:
+                    game.current_state = game.current_state.make_move(move)
+                serial_move, serial = time_move(minimax_recursive_strategy,
+                                                game)
+                parallel_move, parallel = time_move(
+                    minimax_parallel_strategy, game, *args)
+                assert serial_move == parallel_move
+                print("{} size {} after {}: serial {:.3f}s, parallel "
+                      "{:.3f}s, speedup {:.2f}x".format(
+                          game_class.__name__, board_size, opening, serial,
+                          parallel, serial / parallel))
+
+
+def count_nodes(game, orderer=None):
+    """
+    Return the exact score of game.current_state and the number of
+    positions go_through searched to find it, with the shared
+    transposition table emptied first.
+    >>> count_nodes(BitboardStonehengeGame(True, 2), MoveOrderer())
+    (1, 20)
+    """
+    TABLE.clear()
+    counter = NodeCounter(game)
+    score = go_through(counter, game.current_state, -INFINITY, INFINITY,
+                       TABLE, orderer)
+    return score, counter.nodes
+
+
+def ordering_benchmark(openings=None):
+    """
+    Print the positions searched to solve the position after each opening
+    in openings (by default ORDERING_OPENINGS, keyed by board size), with
+    moves in their natural order and ordered by a MoveOrderer.
+    """
+    if openings is None:
+        openings = ORDERING_OPENINGS
+    for board_size, opening in sorted(openings.items()):
+        game = BitboardStonehengeGame(True, board_size)
+        for move in opening:
+            game.current_state = game.current_state.make_move(move)
+        natural = count_nodes(game)[1]
+        start = time.perf_counter()
+        ordered = count_nodes(game, MoveOrderer())[1]
+        print("size {} after {}: {} positions in natural order, {} "
+              "ordered ({:.0%} fewer, {:.2f}s)".format(
+                  board_size, opening, natural, ordered,
+                  1 - ordered / natural, time.perf_counter() - start))
+
+
+def suite_positions(board_sizes=(1, 2, 3, 4), corpus=None):
+    """
+    Return (name, board size, moves) for an empty board of each size in
+    board_sizes followed by the positions of corpus (by default CORPUS).
+    >>> suite_positions((1,), [(2, "DB")])
+    [('empty-1', 1, ''), ('2:DB', 2, 'DB')]
+    """
+    if corpus is None:
+        corpus = CORPUS
+    positions = [("empty-{}".format(size), size, "") for size in board_sizes]
+    return positions + [("{}:{}".format(size, moves), size, moves)
+                        for size, moves in corpus]
+
+
+def benchmark_move(strategy, game_class, board_size, moves,
+                   measure_memory=True, counted=True):
+    """
+    Return a dict describing strategy choosing a move after moves on an
+    empty board_size board of game_class: the move, the seconds it took,
+    the positions searched (only those in this process) and positions per
+    second, or None for both unless counted, and, if measure_memory, the
+    peak bytes allocated while choosing again with tracemalloc on. Both
+    runs start from clear_search_state(), and the solved-position
+    databases are not used.
+    >>> result = benchmark_move(minimax_recursive_strategy,
+    ...                         BitboardStonehengeGame, 2, "DB", False)
+    >>> result["move"], result["nodes"]
+    ('F', 13)
+    >>> result = benchmark_move(rough_outcome_strategy,
+    ...                         BitboardStonehengeGame, 2, "DB", False,
+    ...                         counted=False)
+    >>> result["nodes"], result["nodes_per_sec"]
+    (None, None)
+    """
+    game = game_class(True, board_size)
+    for move in moves:
+        game.current_state = game.current_state.make_move(move)
+    counter = NodeCounter(game)
+    move, seconds = time_move(strategy, counter)
+    result = {"move": move, "seconds": seconds, "nodes": None,
+              "nodes_per_sec": None, "peak_bytes": None}
+    if counted:
+        result["nodes"] = counter.nodes
+        if seconds:
+            result["nodes_per_sec"] = counter.nodes / seconds
+    if measure_memory:
+        clear_search_state()
+        tracemalloc.start()
+        without_solved(strategy, game)
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run_suite(strategies=None, game_classes=None, positions=None,
+              measure_memory=True, output=sys.stdout):
+    """
+    Benchmark each strategy named in strategies (keys of STRATEGIES, all by
+    default) on each of positions (suite_positions() by default), with
+    each game class in game_classes, writing one JSON record per run to
+    output. Empty boards larger than MAX_EMPTY_BOARD allows are skipped.
+    """
+    if strategies is None:
+        strategies = list(STRATEGIES)
+    if game_classes is None:
+        game_classes = [StonehengeGame, BitboardStonehengeGame]
+    if positions is None:
+        positions = suite_positions()
+    for name, board_size, moves in positions:
+        for key in strategies:
+            if moves == "" and board_size > MAX_EMPTY_BOARD.get(key, 0):
+                continue
+            for game_class in game_classes:
+                record = {"strategy": key, "position": name,
+                          "board_size": board_size,
+                          "game": game_class.__name__}
+                record.update(benchmark_move(STRATEGIES[key], game_class,
+                                             board_size, moves,
+                                             measure_memory,
+                                             key not in UNCOUNTED))
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("benchmark", nargs="?", default="suite",
+                        choices=["suite", "parallel", "ordering"])
+    parser.add_argument("--strategies", nargs="+", choices=list(STRATEGIES),
+                        help="strategies for the suite (default: all)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc peak memory runs")
+    parser.add_argument("--output", type=argparse.FileType("w"),
+                        default=sys.stdout, help="file for the JSON records")
+    arguments = parser.parse_args()
+    if arguments.benchmark == "parallel":
+        parallel_speedup()
+    elif arguments.benchmark == "ordering":
+        ordering_benchmark()
+    else:
+        run_suite(arguments.strategies,
+                  measure_memory=not arguments.no_memory,
+                  output=arguments.output)
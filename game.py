@@ -28,14 +28,27 @@ class Game:
         """
         raise NotImplementedError
 
-    def is_winner(self, player: str) -> bool:
+    def is_winner(self, player: str, state: GameState = None) -> bool:
         """
-        Return whether player has won the game.
+        Return whether player has won the game at state, or at
+        self.current_state if state is None.
 
         Precondition: player is 'p1' or 'p2'.
         """
         raise NotImplementedError
 
+    def get_score(self, state: GameState) -> int:
+        """
+        Return the score of state, a state where the game is over, for the
+        player whose turn it is at state.
+        """
+        player = state.get_current_player_name()
+        if self.is_winner(player, state):
+            return state.WIN
+        if self.is_winner('p2' if player == 'p1' else 'p1', state):
+            return state.LOSE
+        return state.DRAW
+
     def str_to_move(self, string: str) -> Any:
         """
         Return the move that string represents. If string is not a move,
@@ -10,21 +10,23 @@ your own curiousity!)
 """
 # TODO: import the modules needed to make game_interface run.
 from strategy import *
-from typing import Any, Callable
+from typing import Any, Callable, Optional
 from subtract_square_game import SubtractSquareGame
-from stonehenge import StonehengeGame
+from stonehenge import StonehengeGame, BitboardStonehengeGame
+from search_stats import SearchStats, measure_move
+from registry import STRATEGIES
+from ponder import Ponderer
 # TODO: Replace None with the corresponding class name for your games.
 # 'h' should map to Stonehenge.
 playable_games = {'s': SubtractSquareGame,
-                  'h': StonehengeGame}
+                  'h': StonehengeGame,
+                  'b': BitboardStonehengeGame}
 
 # TODO: Replace None with the corresponding function names for your strategies.
 # 'mr' should map to your recursive implementation of minimax while
 # 'mi' should map to your iterative implementation of minimax
-usable_strategies = {'i': interactive_strategy,
-                     'ro': rough_outcome_strategy,
-                     'mr': minimax_recursive_strategy,
-                     'mi': minimax_iterative_strategy}
+usable_strategies = {'i': interactive_strategy}
+usable_strategies.update(STRATEGIES)
 
 
 class GameInterface:
@@ -34,7 +36,9 @@ class GameInterface:
     """
 
     def __init__(self, game: Any, p1_strategy: Callable,
-                 p2_strategy: Callable[[Any], Any]) -> None:
+                 p2_strategy: Callable[[Any], Any],
+                 stats_reporter: Optional[Callable[[str, SearchStats], None]]
+                 = None, ponder: bool = False) -> None:
         """
         Initialize this GameInterface, setting its active game to game, and
         using the strategies p1_strategy for Player 1 and p2_strategy for
@@ -46,6 +50,13 @@ class GameInterface:
         :type p1_strategy:
         :param p2_strategy: The strategy for Play 2.
         :type p2_strategy:
+        :param stats_reporter: If given, called with the player's name and
+            the SearchStats of each move a strategy picks.
+        :type stats_reporter:
+        :param ponder: Whether to search the replies of a person playing
+            interactive_strategy in the background while they choose, for
+            a strategy playing against them.
+        :type ponder:
         """
         first_player = input("Type y if player 1 is to make the first move: ")
         is_p1_turn = False
@@ -55,6 +66,8 @@ class GameInterface:
         self.game = game(is_p1_turn)
         self.p1_strategy = p1_strategy
         self.p2_strategy = p2_strategy
+        self.stats_reporter = stats_reporter
+        self.ponderer = Ponderer() if ponder else None
 
     def play(self) -> None:
         """
@@ -75,12 +88,32 @@ class GameInterface:
             for move in possible_moves:
                 print(move)
 
+            current_strategy = self.p2_strategy
+            other_strategy = self.p1_strategy
+            if current_state.get_current_player_name() == 'p1':
+                current_strategy, other_strategy = other_strategy, \
+                    current_strategy
+
+            # While a person chooses, search their replies for the other
+            # player. Nothing else may use the table until it is stopped.
+            pondering = self.ponderer is not None and \
+                current_strategy is interactive_strategy and \
+                other_strategy is not interactive_strategy
+            if pondering:
+                self.ponderer.start(self.game, current_state)
+
             # Pick a (legal) move.
             while not current_state.is_valid_move(move_to_make):
-                current_strategy = self.p2_strategy
-                if current_state.get_current_player_name() == 'p1':
-                    current_strategy = self.p1_strategy
-                move_to_make = current_strategy(self.game)
+                if self.stats_reporter is None or pondering:
+                    move_to_make = current_strategy(self.game)
+                else:
+                    move_to_make, stats = measure_move(current_strategy,
+                                                       self.game)
+                    self.stats_reporter(
+                        current_state.get_current_player_name(), stats)
+
+            if pondering:
+                self.ponderer.stop()
 
             # Apply the move
             current_player_name = current_state.get_current_player_name()
@@ -102,6 +135,14 @@ class GameInterface:
             print("It's a tie!")
 
 
+def print_stats(player: str, stats: SearchStats) -> None:
+    """
+    Print the statistics of the search player's strategy made for a move.
+    """
+    print("Search statistics for {}:".format(player))
+    print(stats)
+
+
 if __name__ == '__main__':
     games = ", ".join(["'{}': {}".format(key, playable_games[key].__name__) if
                        playable_games[key] is not None else
@@ -127,6 +168,11 @@ if __name__ == '__main__':
     while p2 not in usable_strategies.keys():
         p2 = input("Select the strategy for Player 2 ({}): ".format(strategies))
 
+    show_stats = input("Type y to print search statistics after each move: ")
+    reporter = print_stats if show_stats.lower() == 'y' else None
+    ponder_answer = input("Type y to search on the opponent's time: ")
+
     GameInterface(playable_games[chosen_game], usable_strategies[p1],
-                  usable_strategies[p2]).play()
+                  usable_strategies[p2], reporter,
+                  ponder_answer.lower() == 'y').play()
     
\ No newline at end of file
@@ -40,6 +40,13 @@ class GameState:
         """
         raise NotImplementedError
 
+    def iter_possible_moves(self) -> Any:
+        """
+        Return an iterator over the moves of get_possible_moves(), in the
+        same order, for searches that may not need them all.
+        """
+        return iter(self.get_possible_moves())
+
     def get_current_player_name(self) -> str:
         """
         Return 'p1' if the current player is Player 1, and 'p2' if the current
@@ -55,6 +62,20 @@ class GameState:
         """
         raise NotImplementedError
 
+    def apply_move(self, move: Any) -> Any:
+        """
+        Apply move to this GameState in place, and return what undo_move()
+        needs to take it back.
+        """
+        raise NotImplementedError
+
+    def undo_move(self, undo: Any) -> None:
+        """
+        Take back the last move applied to this GameState, given what
+        apply_move() returned for it.
+        """
+        raise NotImplementedError
+
     def is_valid_move(self, move: Any) -> bool:
         """
         Return whether move is a valid move for this GameState.
@@ -68,6 +89,29 @@ class GameState:
         """
         raise NotImplementedError
 
+    def get_position_key(self) -> Any:
+        """
+        Return a hashable key that identifies this state exactly, so it can
+        be used in caches such as a transposition table.
+        """
+        raise NotImplementedError
+
+    def get_canonical_key(self) -> Any:
+        """
+        Return the same key for this state and every state that is
+        equivalent to it by a symmetry of the game, for caches of scores.
+        By default this is get_position_key().
+        """
+        return self.get_position_key()
+
+    def get_move_priorities(self) -> dict:
+        """
+        Return a dict mapping each possible move to a priority, where moves
+        with higher priorities look more promising and should be searched
+        first. By default every move has priority 0.
+        """
+        return {move: 0 for move in self.get_possible_moves()}
+
     def rough_outcome(self) -> float:
         """
         Return an estimate in interval [LOSE, WIN] of best outcome the current
@@ -0,0 +1,118 @@
+"""
+Games wrapped for one search
+
+A search calls is_over() once for each position it searches, so a wrapper
+that overrides it can watch the search or stop it without the strategy
+being changed.
+"""
+from typing import Any, Tuple
+
+
+class SearchCancelled(Exception):
+    """
+    Raised inside a search on a CancellableGame once it has been stopped
+    """
+
+
+class GameWrapper:
+    """
+    Wraps a game for one search, passing everything on to it. Subclasses
+    watch or stop the search by overriding is_over(), which a search calls
+    once for each position it searches.
+
+    game - the wrapped game
+    current_state - the current state of game
+    """
+    game: Any
+    current_state: Any
+
+    def __init__(self, game: Any) -> None:
+        """
+        Initialize a GameWrapper wrapping game.
+        >>> from stonehenge import StonehengeGame
+        >>> game = StonehengeGame(True, 1)
+        >>> wrapper = GameWrapper(game)
+        >>> wrapper.is_over(game.current_state)
+        False
+        >>> wrapper.get_instructions() == game.get_instructions()
+        True
+        """
+        self.game = game
+        self.current_state = game.current_state
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Return the attribute name of the wrapped game.
+        """
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.game, name)
+
+    def __reduce__(self) -> Tuple:
+        """
+        Pickle as the wrapped game, so searches in other processes run on
+        the plain game.
+        """
+        return self.game.__reduce__()
+
+    def unwrap(self, state: Any) -> Any:
+        """
+        Return the state of the wrapped game that state stands for.
+        """
+        return state
+
+    def is_over(self, state: Any) -> bool:
+        """
+        Return whether the game is over at state.
+        """
+        return self.game.is_over(self.unwrap(state))
+
+    def is_winner(self, player: str, state: Any = None) -> bool:
+        """
+        Return whether player has won the game at state.
+        """
+        return self.game.is_winner(player, self.unwrap(state))
+
+    def get_score(self, state: Any) -> int:
+        """
+        Return the score of the finished state for the player to move.
+        """
+        return self.game.get_score(self.unwrap(state))
+
+
+class CancellableGame(GameWrapper):
+    """
+    Wraps a game for a search in another thread or process, raising
+    SearchCancelled as soon as a position is searched after stop_event (a
+    threading or multiprocessing Event) is set
+    >>> import threading
+    >>> from stonehenge import StonehengeGame
+    >>> stop_event = threading.Event()
+    >>> game = CancellableGame(StonehengeGame(True, 1), stop_event)
+    >>> stop_event.set()
+    >>> game.is_over(game.current_state)
+    Traceback (most recent call last):
+    ...
+    game_wrapper.SearchCancelled
+    """
+    stop_event: Any
+
+    def __init__(self, game: Any, stop_event: Any) -> None:
+        """
+        Initialize a CancellableGame for game, cancelled by stop_event.
+        """
+        GameWrapper.__init__(self, game)
+        self.stop_event = stop_event
+
+    def is_over(self, state: Any) -> bool:
+        """
+        Return whether game is over at state, unless the search is stopped.
+        """
+        if self.stop_event.is_set():
+            raise SearchCancelled
+        return GameWrapper.is_over(self, state)
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
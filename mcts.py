@@ -0,0 +1,219 @@
+"""
+A Monte Carlo tree search (UCT) strategy for Stonehenge
+
+Searches a tree of BitboardStonehengeStates, scoring new positions by
+finishing the game with random moves, and keeps the tree between calls
+so that the part of it below the moves actually played is searched on.
+"""
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from stonehenge import BitboardStonehengeState
+
+# Seconds mcts_strategy may spend choosing a move
+MCTS_TIME_LIMIT = 1.0
+# The weight of exploring rarely tried moves against playing well-scoring
+# ones, in the UCT formula
+EXPLORATION = math.sqrt(2)
+# Processes mcts_strategy searches in; each searches its own tree and their
+# visit counts are added up
+MCTS_WORKERS = 1
+
+
+class MCTSNode:
+    """
+    A position in a Monte Carlo search tree.
+
+    state - the BitboardStonehengeState of this position
+    parent - the node this one was reached from, or None for the root
+    children - maps each tried move to the node it leads to
+    untried - the moves of state without a node yet, in random order
+    visits - the playouts that passed through this node
+    wins - the playouts through this node won by the player who moved
+           into it
+    """
+    state: BitboardStonehengeState
+    parent: Optional['MCTSNode']
+    children: Dict[str, 'MCTSNode']
+    untried: list
+    visits: int
+    wins: int
+
+    def __init__(self, state: BitboardStonehengeState,
+                 parent: Optional['MCTSNode'], rng: random.Random) -> None:
+        """
+        Initialize an unvisited MCTSNode of state, shuffling its moves with
+        rng.
+        """
+        self.state, self.parent = state, parent
+        self.children = {}
+        self.untried = state.get_possible_moves()
+        rng.shuffle(self.untried)
+        self.visits, self.wins = 0, 0
+
+    def select_child(self, exploration: float) -> 'MCTSNode':
+        """
+        Return the child with the highest UCT value: its share of playouts
+        won, plus exploration times a bonus for being rarely tried.
+        """
+        log_visits = math.log(self.visits)
+        return max(self.children.values(),
+                   key=lambda child: child.wins / child.visits +
+                   exploration * math.sqrt(log_visits / child.visits))
+
+    def find(self, key: Tuple, depth: int) -> Optional['MCTSNode']:
+        """
+        Return the node of this tree at most depth moves below this one
+        whose state has position key key, or None if there is none.
+        """
+        if self.state.get_position_key() == key:
+            return self
+        if depth > 0:
+            for child in self.children.values():
+                found = child.find(key, depth - 1)
+                if found is not None:
+                    return found
+        return None
+
+
+def random_playout(state: BitboardStonehengeState,
+                   rng: random.Random) -> bool:
+    """
+    Return whether p1 wins when the game at state is played to the end
+    with random moves.
+    >>> state = BitboardStonehengeState(True, 1)
+    >>> random_playout(state, random.Random(0))
+    True
+    """
+    playout = BitboardStonehengeState.from_position_key(
+        state.get_position_key())
+    moves = playout.get_possible_moves()
+    rng.shuffle(moves)
+    for move in moves:
+        if playout.is_over():
+            break
+        playout.apply_move(move)
+    # Only the player who moved last can have captured enough leylines
+    return not playout.p1_turn
+
+
+def search(root: MCTSNode, deadline: float, iterations: Optional[int],
+           rng: random.Random, exploration: float = EXPLORATION) -> None:
+    """
+    Add playouts to the tree at root until deadline (a time.perf_counter()
+    value) has passed or, if iterations is given, that many have been
+    made, whichever is first.
+    """
+    done = 0
+    while (iterations is None or done < iterations) and \
+            (done == 0 or time.perf_counter() < deadline):
+        node = root
+        while node.untried == [] and node.children != {}:
+            node = node.select_child(exploration)
+        if node.untried != []:
+            move = node.untried.pop()
+            child = MCTSNode(node.state.make_move(move), node, rng)
+            node.children[move] = child
+            node = child
+        p1_wins = random_playout(node.state, rng)
+        while node is not None:
+            node.visits += 1
+            if p1_wins != node.state.p1_turn:
+                node.wins += 1
+            node = node.parent
+        done += 1
+
+
+class SearchTree:
+    """
+    The tree of the last Monte Carlo search, kept for the next one.
+
+    root - the root of the last search, or None
+    """
+    root: Optional[MCTSNode]
+
+    def __init__(self) -> None:
+        """
+        Initialize a SearchTree with no tree kept.
+        """
+        self.root = None
+
+    def get_root(self, state: Any, rng: random.Random) -> MCTSNode:
+        """
+        Return the node for state in the kept tree, which holds it if state
+        is at most two moves after the last search's root, or else a new
+        root for state.
+        """
+        key = state.get_position_key()
+        node = None if self.root is None else self.root.find(key, 2)
+        if node is None:
+            node = MCTSNode(BitboardStonehengeState.from_position_key(key),
+                            None, rng)
+        node.parent = None
+        self.root = node
+        return node
+
+
+# The tree mcts_strategy keeps between moves in this process
+TREE = SearchTree()
+
+
+def root_visits(key: Tuple, time_limit: float, iterations: Optional[int],
+                seed: Optional[int]) -> Dict[str, int]:
+    """
+    Search a new tree for the position with position key key, as
+    mcts_strategy does, and return the number of visits of each root
+    move. Runs in an mcts_strategy worker.
+    """
+    rng = random.Random(seed)
+    root = MCTSNode(BitboardStonehengeState.from_position_key(key), None, rng)
+    search(root, time.perf_counter() + time_limit, iterations, rng)
+    return {move: child.visits for move, child in root.children.items()}
+
+
+def mcts_strategy(game: Any, time_limit: float = MCTS_TIME_LIMIT,
+                  iterations: Optional[int] = None,
+                  workers: int = MCTS_WORKERS,
+                  seed: Optional[int] = None) -> Any:
+    """
+    Return the move of game.current_state that Monte Carlo tree search
+    visits most in time_limit seconds or, if iterations is given, at most
+    that many playouts.
+
+    With one worker the tree is kept for the next call. With more, each
+    worker process searches its own new tree and their visit counts are
+    added up. seed seeds the random moves, for repeatable searches.
+    >>> from stonehenge import BitboardStonehengeGame
+    >>> TREE.root = None
+    >>> game = BitboardStonehengeGame(True, 2)
+    >>> game.current_state = game.current_state.make_move("D").make_move("B")
+    >>> mcts_strategy(game, iterations=2000, seed=1)
+    'F'
+    """
+    state = game.current_state
+    moves = state.get_possible_moves()
+    if moves == []:
+        return None
+    if workers <= 1:
+        rng = random.Random(seed)
+        root = TREE.get_root(state, rng)
+        search(root, time.perf_counter() + time_limit, iterations, rng)
+        visits = {move: child.visits for move, child in root.children.items()}
+    else:
+        seeds = [None if seed is None else seed + i for i in range(workers)]
+        visits = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for found in pool.map(root_visits,
+                                  [state.get_position_key()] * workers,
+                                  [time_limit] * workers,
+                                  [iterations] * workers, seeds):
+                for move, count in found.items():
+                    visits[move] = visits.get(move, 0) + count
+    return max(moves, key=lambda move: visits.get(move, 0))
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
@@ -0,0 +1,110 @@
+"""
+Searching on the opponent's time
+
+While the opponent chooses a move, a Ponderer searches each reply they
+could make in a background thread, saving exact scores to the shared
+transposition table, so that the minimax strategies find most of their
+next search already done. Stopping it cancels the search within one
+position.
+"""
+import threading
+from typing import Any, Optional
+from strategy import TABLE, INFINITY, SOLVED, MoveOrderer, go_through
+from solved_db import solved_move
+from game_wrapper import CancellableGame, SearchCancelled
+from transposition import TranspositionTable
+
+
+class Ponderer:
+    """
+    Searches the replies to a position in a background thread.
+
+    table - the transposition table the search fills
+    replies_searched - the replies whose search finished in the last
+                       pondering
+    """
+    table: TranspositionTable
+    replies_searched: int
+
+    def __init__(self, table: TranspositionTable = TABLE) -> None:
+        """
+        Initialize a Ponderer filling table, not yet pondering.
+        """
+        self.table = table
+        self.replies_searched = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self, game: Any, state: Any) -> None:
+        """
+        Stop any pondering, then start searching each move of state, the
+        position the opponent is choosing a move at, most promising first.
+        Nothing is searched if state is in one of the SOLVED databases.
+        >>> from stonehenge import BitboardStonehengeGame
+        >>> ponderer = Ponderer(TranspositionTable(1000))
+        >>> game = BitboardStonehengeGame(True, 2)
+        >>> state = game.current_state.make_move("A")
+        >>> ponderer.start(game, state)
+        >>> ponderer.wait()
+        >>> ponderer.replies_searched == 6 or \\
+        ...     solved_move(SOLVED, state) is not None
+        True
+        """
+        self.stop()
+        if solved_move(SOLVED, state) is not None:
+            return
+        self._stop_event = threading.Event()
+        self.replies_searched = 0
+        self._thread = threading.Thread(
+            target=self._search,
+            args=(CancellableGame(game, self._stop_event), state),
+            daemon=True)
+        self._thread.start()
+
+    def _search(self, game: CancellableGame, state: Any) -> None:
+        """
+        Search each move of state to the end of the game, until stopped.
+        """
+        orderer = MoveOrderer()
+        try:
+            for move in orderer.order(state, state.get_possible_moves(), 0):
+                go_through(game, state.make_move(move), -INFINITY, INFINITY,
+                           self.table, orderer, 1)
+                self.replies_searched += 1
+        except SearchCancelled:
+            pass
+
+    def is_pondering(self) -> bool:
+        """
+        Return whether the background search is still running.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait up to timeout seconds, or for as long as it takes, for the
+        background search to finish.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stop(self) -> None:
+        """
+        Cancel the background search and wait for it to end, so that the
+        table is no longer written to.
+        >>> from stonehenge import BitboardStonehengeGame
+        >>> ponderer = Ponderer(TranspositionTable(1000))
+        >>> game = BitboardStonehengeGame(True, 5)
+        >>> ponderer.start(game, game.current_state)
+        >>> ponderer.stop()
+        >>> ponderer.is_pondering()
+        False
+        """
+        self._stop_event.set()
+        self.wait()
+        self._thread = None
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
@@ -0,0 +1,38 @@
+"""
+The strategies that choose a move without asking for input
+
+game_interface offers these, together with interactive_strategy, and
+benchmark and tournament run them, all by the keys of STRATEGIES, so a new
+strategy only has to be added here.
+"""
+from strategy import rough_outcome_strategy, minimax_recursive_strategy, \
+    minimax_iterative_strategy, alphabeta_iterative_strategy, \
+    minimax_parallel_strategy, iterative_deepening_strategy, \
+    lazy_negamax_strategy, proof_number_strategy
+from batch_eval import batch_search_strategy
+from mcts import mcts_strategy
+
+STRATEGIES = {'ro': rough_outcome_strategy,
+              'mr': minimax_recursive_strategy,
+              'mi': minimax_iterative_strategy,
+              'ai': alphabeta_iterative_strategy,
+              'mp': minimax_parallel_strategy,
+              'id': iterative_deepening_strategy,
+              'ln': lazy_negamax_strategy,
+              'pn': proof_number_strategy,
+              'bs': batch_search_strategy,
+              'mc': mcts_strategy}
+
+# The largest empty board benchmark runs each strategy on; the exhaustive
+# ones take minutes or more on an empty board of size 4
+MAX_EMPTY_BOARD = {'ro': 4, 'mr': 3, 'mi': 3, 'ai': 3, 'mp': 3, 'id': 4,
+                   'ln': 3, 'pn': 4, 'bs': 4, 'mc': 4}
+
+# The strategies that never check positions with game.is_over, so that
+# benchmark cannot count the positions they search
+UNCOUNTED = {'ro', 'bs', 'mc'}
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
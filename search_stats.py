@@ -0,0 +1,242 @@
+"""
+Statistics about the search a strategy makes to choose one move
+
+The strategies are not changed to collect these: measure_move() hands a
+strategy a StatsGame, whose states record what is done with them, so a
+strategy called on the plain game pays nothing for this module.
+"""
+import time
+from typing import Any, Callable, Tuple
+from strategy import TABLE
+from game_wrapper import GameWrapper
+
+
+class SearchStats:
+    """
+    What one search did.
+
+    nodes - the positions searched, i.e. checked with is_over
+    terminals - the searched positions where the game is over
+    max_depth - the most moves made from the searched position
+    cache_hits - transposition table lookups that found a score
+    cache_misses - transposition table lookups that found nothing
+    move_time - seconds spent in get_possible_moves
+    state_time - seconds spent in make_move
+    terminal_time - seconds spent in is_over
+    total_time - seconds the whole search took
+    branching - maps each depth to the total number of moves generated at
+                that depth and the number of times moves were generated
+    """
+    nodes: int
+    terminals: int
+    max_depth: int
+    cache_hits: int
+    cache_misses: int
+    move_time: float
+    state_time: float
+    terminal_time: float
+    total_time: float
+    branching: dict
+
+    def __init__(self) -> None:
+        """
+        Initialize a SearchStats with nothing recorded.
+        >>> stats = SearchStats()
+        >>> stats.nodes, stats.max_depth, stats.branching
+        (0, 0, {})
+        """
+        self.nodes, self.terminals, self.max_depth = 0, 0, 0
+        self.cache_hits, self.cache_misses = 0, 0
+        self.move_time, self.state_time, self.terminal_time = 0.0, 0.0, 0.0
+        self.total_time = 0.0
+        self.branching = {}
+
+    def record_moves(self, depth: int, count: int) -> None:
+        """
+        Record that count moves were generated for a position depth moves
+        deep.
+        >>> stats = SearchStats()
+        >>> stats.record_moves(1, 4)
+        >>> stats.record_moves(1, 2)
+        >>> stats.get_branching_factors()
+        {1: 3.0}
+        """
+        total, times = self.branching.get(depth, (0, 0))
+        self.branching[depth] = (total + count, times + 1)
+
+    def get_branching_factors(self) -> dict:
+        """
+        Return a dict mapping each depth to the average number of moves
+        generated there.
+        """
+        return {depth: total / times for depth, (total, times)
+                in sorted(self.branching.items())}
+
+    def __str__(self) -> str:
+        """
+        Return a readable report of these statistics.
+        >>> print(SearchStats())  # doctest: +NORMALIZE_WHITESPACE
+        nodes: 0, terminals: 0, max depth: 0, cache hits: 0, misses: 0
+        time: 0.000s (moves 0.000s, make_move 0.000s, is_over 0.000s)
+        branching:
+        """
+        branching = ", ".join("{}: {:.2f}".format(depth, factor)
+                              for depth, factor
+                              in self.get_branching_factors().items())
+        return ("nodes: {}, terminals: {}, max depth: {}, cache hits: {}, "
+                "misses: {}\ntime: {:.3f}s (moves {:.3f}s, make_move {:.3f}s, "
+                "is_over {:.3f}s)\nbranching: {}").format(
+                    self.nodes, self.terminals, self.max_depth,
+                    self.cache_hits, self.cache_misses, self.total_time,
+                    self.move_time, self.state_time, self.terminal_time,
+                    branching)
+
+
+class StatsState:
+    """
+    Wraps a game state, recording in stats the moves generated and made
+    from it. Everything else is passed on to the wrapped state.
+
+    state - the wrapped state
+    stats - where to record
+    depth - the moves made from the searched position to reach this one
+    """
+    state: Any
+    stats: SearchStats
+    depth: int
+
+    def __init__(self, state: Any, stats: SearchStats, depth: int) -> None:
+        """
+        Initialize a StatsState wrapping state, depth moves deep.
+        """
+        self.state, self.stats, self.depth = state, stats, depth
+        if depth > stats.max_depth:
+            stats.max_depth = depth
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Return the attribute name of the wrapped state.
+        """
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.state, name)
+
+    def __reduce__(self) -> Tuple:
+        """
+        Pickle as the wrapped state, so searches in other processes run
+        unrecorded.
+        """
+        return self.state.__reduce__()
+
+    def __str__(self) -> str:
+        """
+        Return the wrapped state as a string.
+        """
+        return str(self.state)
+
+    def get_possible_moves(self) -> list:
+        """
+        Return the moves of the wrapped state, recording how many there are.
+        """
+        start = time.perf_counter()
+        moves = self.state.get_possible_moves()
+        self.stats.move_time += time.perf_counter() - start
+        self.stats.record_moves(self.depth, len(moves))
+        return moves
+
+    def make_move(self, move: Any) -> "StatsState":
+        """
+        Return the wrapped state after move, wrapped one move deeper.
+        """
+        start = time.perf_counter()
+        state = self.state.make_move(move)
+        self.stats.state_time += time.perf_counter() - start
+        return StatsState(state, self.stats, self.depth + 1)
+
+
+class StatsGame(GameWrapper):
+    """
+    Wraps a game for one search, recording what the search does in stats.
+
+    stats - where to record
+    current_state - the current state of game, wrapped
+    """
+    stats: SearchStats
+    current_state: StatsState
+
+    def __init__(self, game: Any, stats: SearchStats) -> None:
+        """
+        Initialize a StatsGame wrapping game.
+        """
+        GameWrapper.__init__(self, game)
+        self.stats = stats
+        self.current_state = StatsState(game.current_state, stats, 0)
+
+    def unwrap(self, state: Any) -> Any:
+        """
+        Return the state a StatsState wraps, or state itself if it is not
+        one.
+        """
+        return state.state if isinstance(state, StatsState) else state
+
+    def is_over(self, state: Any) -> bool:
+        """
+        Return whether the game is over at state, recording state as
+        searched.
+        """
+        start = time.perf_counter()
+        over = GameWrapper.is_over(self, state)
+        self.stats.terminal_time += time.perf_counter() - start
+        self.stats.nodes += 1
+        if over:
+            self.stats.terminals += 1
+        return over
+
+
+def measure_move(strategy: Callable[[Any], Any],
+                 game: Any) -> Tuple[Any, SearchStats]:
+    """
+    Return the move strategy picks for game and the SearchStats of the
+    search it made. Lookups in the shared transposition table are counted
+    while the strategy runs.
+    >>> from stonehenge import BitboardStonehengeGame
+    >>> from strategy import minimax_recursive_strategy
+    >>> TABLE.clear()
+    >>> game = BitboardStonehengeGame(True, 4)
+    >>> for move in "ABCDEFGHIJKLMN":
+    ...     game.current_state = game.current_state.make_move(move)
+    >>> move, stats = measure_move(minimax_recursive_strategy, game)
+    >>> move, stats.nodes, stats.terminals, stats.max_depth
+    ('O', 7, 3, 3)
+    >>> stats.cache_hits, stats.cache_misses
+    (0, 7)
+    >>> isinstance(game.current_state, StatsState)
+    False
+    """
+    stats = SearchStats()
+    lookup = TABLE.lookup
+
+    def counted_lookup(key: Any) -> Any:
+        """
+        Return the score stored for key, counting the lookup.
+        """
+        score = lookup(key)
+        if score is None:
+            stats.cache_misses += 1
+        else:
+            stats.cache_hits += 1
+        return score
+
+    TABLE.lookup = counted_lookup
+    start = time.perf_counter()
+    try:
+        move = strategy(StatsGame(game, stats))
+    finally:
+        stats.total_time = time.perf_counter() - start
+        del TABLE.lookup
+    return move, stats
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
@@ -0,0 +1,252 @@
+"""
+Databases of solved Stonehenge positions
+
+Run "python solved_db.py 1 2 3" to solve those board sizes completely and
+write a database for each into SOLVED_DIR, where strategy.py finds them
+when it is imported.
+
+A database is a header followed by one fixed-size record per position
+that is not over, sorted by packed position key so that a lookup is a
+binary search of the memory-mapped file. Each record holds the score of
+the position for the player to move and its best move, the first of the
+moves with that score in get_possible_moves() order, so that a strategy
+answering from the database picks the same move as its search would.
+"""
+import argparse
+import mmap
+import os
+import struct
+from typing import Any, Dict, Optional, Tuple
+from stonehenge import BitboardStonehengeGame, get_topology
+
+# Directory the databases are written to and loaded from
+SOLVED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "solved")
+# Magic bytes, board size and number of records
+HEADER = struct.Struct("<4sII")
+MAGIC = b"SHDB"
+# Packed position key, then the score + 1 in the low two bits and the index
+# of the best move's cell above them
+RECORD = struct.Struct("<QB")
+# The most bits a packed position key can have to fit in a record
+KEY_BITS = 64
+
+
+def database_path(board_size: int, directory: str = SOLVED_DIR) -> str:
+    """
+    Return the path of the database for board_size in directory.
+    >>> os.path.basename(database_path(3))
+    'stonehenge_3.db'
+    """
+    return os.path.join(directory, "stonehenge_{}.db".format(board_size))
+
+
+def pack_key(key: Tuple) -> int:
+    """
+    Return the position key key, without its board size, as one integer.
+    >>> pack_key((1, True, 0b001, 0b010, 0b000010, 0b000001))
+    8483
+    """
+    topology = get_topology(key[0])
+    cells, lines = len(topology.labels), len(topology.leylines)
+    return (int(key[1]) | key[2] << 1 | key[3] << (1 + cells)
+            | key[4] << (1 + 2*cells) | key[5] << (1 + 2*cells + lines))
+
+
+def key_bits(board_size: int) -> int:
+    """
+    Return the number of bits pack_key() needs for a board_size board.
+    >>> key_bits(3), key_bits(4)
+    (49, 67)
+    """
+    topology = get_topology(board_size)
+    return 1 + 2*len(topology.labels) + 2*len(topology.leylines)
+
+
+def solve(game: Any, state: Any, solved: Dict) -> int:
+    """
+    Return the minimax score of state for the player to move, recording
+    in solved the score and best move of every position reachable from
+    state that is not over, keyed by position key.
+    >>> game = BitboardStonehengeGame(True, 1)
+    >>> solved = {}
+    >>> solve(game, game.current_state, solved)
+    1
+    >>> solved[game.current_state.get_position_key()]
+    (1, 'A')
+    """
+    key = state.get_position_key()
+    if key in solved:
+        return solved[key][0]
+    if game.is_over(state):
+        return game.get_score(state)
+    best_move, best_score = None, -2
+    for move in state.get_possible_moves():
+        score = -1*solve(game, state.make_move(move), solved)
+        if score > best_score:
+            best_move, best_score = move, score
+    solved[key] = (best_score, best_move)
+    return best_score
+
+
+def write_database(board_size: int, directory: str = SOLVED_DIR) -> int:
+    """
+    Solve every position of a board_size board, with either player moving
+    first, write the database for board_size into directory and return
+    the number of positions in it.
+
+    Raise ValueError, before solving anything, if the position keys of
+    board_size do not fit in a record.
+    >>> write_database(4)
+    Traceback (most recent call last):
+    ...
+    ValueError: board size 4 needs 67-bit position keys; at most 64 fit
+    """
+    if key_bits(board_size) > KEY_BITS:
+        raise ValueError(
+            "board size {} needs {}-bit position keys; at most {} fit".format(
+                board_size, key_bits(board_size), KEY_BITS))
+    game = BitboardStonehengeGame(True, board_size)
+    solved = {}
+    for p1_starts in (True, False):
+        solve(game, game.state_class(p1_starts, board_size), solved)
+    index = get_topology(board_size).index
+    records = sorted((pack_key(key), score + 1 | index[move] << 2)
+                     for key, (score, move) in solved.items())
+    os.makedirs(directory, exist_ok=True)
+    with open(database_path(board_size, directory), "wb") as file:
+        file.write(HEADER.pack(MAGIC, board_size, len(records)))
+        for record in records:
+            file.write(RECORD.pack(*record))
+    return len(records)
+
+
+class SolvedDatabase:
+    """
+    A memory-mapped database of the solved positions of one board size.
+
+    board_size - the size of the board the positions are on
+    """
+    board_size: int
+
+    def __init__(self, path: str) -> None:
+        """
+        Open the database written to path by write_database().
+        >>> import shutil, tempfile
+        >>> directory = tempfile.mkdtemp()
+        >>> write_database(1, directory)
+        2
+        >>> database = SolvedDatabase(database_path(1, directory))
+        >>> database.board_size, len(database)
+        (1, 2)
+        >>> database.close()
+        >>> shutil.rmtree(directory)
+        """
+        with open(path, "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.board_size, self._count = HEADER.unpack_from(self._data)
+        if magic != MAGIC or \
+                len(self._data) != HEADER.size + self._count*RECORD.size:
+            self._data.close()
+            raise ValueError("{} is not a solved-position database".format(
+                path))
+        self._labels = get_topology(self.board_size).labels
+
+    def __len__(self) -> int:
+        """
+        Return the number of positions in this database.
+        """
+        return self._count
+
+    def lookup(self, key: Tuple) -> Optional[Tuple[int, str]]:
+        """
+        Return the score and best move of the position with position key
+        key, or None if it is not in this database.
+        >>> import shutil, tempfile
+        >>> directory = tempfile.mkdtemp()
+        >>> _ = write_database(2, directory)
+        >>> database = SolvedDatabase(database_path(2, directory))
+        >>> state = BitboardStonehengeGame(True, 2).current_state
+        >>> database.lookup(state.get_position_key())
+        (1, 'A')
+        >>> database.lookup(state.make_move('A').get_position_key())
+        (-1, 'B')
+        >>> database.close()
+        >>> shutil.rmtree(directory)
+        """
+        if key[0] != self.board_size:
+            return None
+        packed = pack_key(key)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            found, value = RECORD.unpack_from(
+                self._data, HEADER.size + middle*RECORD.size)
+            if found < packed:
+                low = middle + 1
+            elif found > packed:
+                high = middle
+            else:
+                return (value & 3) - 1, self._labels[value >> 2]
+        return None
+
+    def close(self) -> None:
+        """
+        Unmap this database.
+        """
+        self._data.close()
+
+
+def load_databases(directory: str = SOLVED_DIR) -> Dict[int, SolvedDatabase]:
+    """
+    Return the databases in directory, keyed by board size. Files that are
+    not databases are skipped.
+    >>> load_databases(os.path.join(SOLVED_DIR, "missing"))
+    {}
+    """
+    databases = {}
+    if not os.path.isdir(directory):
+        return databases
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith("stonehenge_") and name.endswith(".db")):
+            continue
+        try:
+            database = SolvedDatabase(os.path.join(directory, name))
+        except (OSError, ValueError, struct.error):
+            continue
+        databases[database.board_size] = database
+    return databases
+
+
+def solved_move(databases: Dict[int, SolvedDatabase], state: Any) -> Any:
+    """
+    Return the best move of state from databases, or None if state is not
+    a Stonehenge position in one of them.
+    >>> solved_move({}, BitboardStonehengeGame(True, 1).current_state)
+    """
+    if not databases:
+        return None
+    try:
+        key = state.get_position_key()
+    except NotImplementedError:
+        return None
+    database = databases.get(key[0])
+    if database is None:
+        return None
+    found = database.lookup(key)
+    return None if found is None else found[1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Solve Stonehenge boards and write their databases.")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1, 2, 3])
+    parser.add_argument("--directory", default=SOLVED_DIR)
+    args = parser.parse_args()
+    for size in args.sizes:
+        if key_bits(size) > KEY_BITS:
+            parser.error("board size {} is too large for a database".format(
+                size))
+    for size in args.sizes:
+        print("board size {}: {} positions".format(
+            size, write_database(size, args.directory)))
@@ -1,6 +1,8 @@
 """
 Game of Stonehenge
 """
+from itertools import permutations, product
+import random
 from game import Game
 from game_state import GameState
 """
@@ -13,10 +15,14 @@ class Cell:
     def __init__(self, value):
         """
         Initialize a new Cell
+
+        Cells belong to a StonehengeTopology and are shared by every state
+        of its board size, so they hold no claims; index is the cell's
+        position in a StonehengeState's claims.
         """
 
         self.value = value
-        self.claim = None
+        self.index = None
         self.right = None
         self.left = None
         self.hori = None
@@ -30,23 +36,6 @@ class Cell:
         """
         return "Cell: {} ".format(self.value)
 
-    def copy(self):
-        """
-        Returns an empty copy of the Cell
-        >>> new_cell = Cell(5)
-        >>> new_cell.right = Cell(2)
-        >>> bruh = new_cell.copy()
-        >>> str(bruh.right)
-        'Cell: 2 '
-        """
-
-        new_cell = Cell(self.value)
-        new_cell.claim = self.claim
-        new_cell.right = self.right
-        new_cell.left = self.left
-        new_cell.hori = self.hori
-        return new_cell
-
 class StonehengeState(GameState):
     """
     The state of StoneHenge Game in certain time
@@ -55,72 +44,25 @@ class StonehengeState(GameState):
         """
         Initialize this game state and set the current player based on
         is_p1_turn.
-        """
-
-        self.p1_turn = is_p1_turn
-        self.board_size = board_size
-        self.board = []
-        self.leylines = [[], [], []]
-        for i in range(len(self.leylines)):
-            for _ in range(board_size+1):
-                self.leylines[i].append("@")
-        counter = 65
-        for i in range(board_size+1):
-            self.board.append([])
-        size = 2
-        for i in range(board_size+1):
-            for _ in range(size):
-                self.board[i].append(Cell(chr(counter)))
-                counter += 1
-            if size == board_size + 1:
-                size -= 1
-            else:
-                size += 1
-        self.init_hori()
-        self.init_left()
-        self.init_right()
-
-    def init_hori(self):
-        """
-        Links up the leylines from left to right
-        >>> new_state = StonehengeState(True, 2)
-        >>> str(new_state.board[0][0].hori)
-        'Cell: B '
-        """
-        for i in range(len(self.board)):
-            for b in range(len(self.board[i])-1):
-                self.board[i][b].hori = self.board[i][b+1]
-
-    def init_left(self):
-        """
-        Links up the leylines from top right to bottom left
-        >>> new_state = StonehengeState(True, 2)
-        >>> str(new_state.board[0][0].left)
-        'Cell: C '
-        """
-        for i in range(len(self.board) - 2):
-            self.board[i][0].left = self.board[i+1][0]
-        for i in range(1, len(self.board)):
-            for b in range(-1 + i, len(self.board) - 2):
-                self.board[b][i].left = self.board[b+1][i]
-            self.board[len(self.board)-2][i].left =\
-                self.board[len(self.board)-1][i-1]
 
-    def init_right(self):
-        """
-        Links up the leyliens from top left to bottom right
+        The linked board of Cells comes from the board size's shared
+        StonehengeTopology; a state only owns its claims (None, "1" or
+        "2" for each cell, by Cell.index), leyline markers and Zobrist
+        hash, which apply_move() keeps up to date.
         >>> new_state = StonehengeState(True, 2)
-        >>> str(new_state.board[0][0].right)
-        'Cell: D '
+        >>> new_state.board is StonehengeState(False, 2).board
+        True
         """
-        for i in range(1, len(self.board)-1):
-            self.board[i-1][i].right = self.board[i][i+1]
-        for i in range(len(self.board)-1):
-            for b in range(i, len(self.board)-2):
-                self.board[b][b-i].right = self.board[b+1][b-i+1]
-            self.board[len(self.board)-2][len(self.board)- 2 - i].right =\
-            self.board[len(self.board)-1][len(self.board)-i-2]
 
+        self.p1_turn = is_p1_turn
+        self.board_size = board_size
+        self.topology = get_topology(board_size)
+        self.board = self.topology.board
+        self.claims = [None] * len(self.topology.labels)
+        self.leylines = [["@"] * (board_size+1) for _ in range(3)]
+        self.p1_leylines = 0
+        self.p2_leylines = 0
+        self.zobrist = self.topology.p1_turn_key if is_p1_turn else 0
 
     def __str__(self) -> str:
         """
@@ -151,10 +93,10 @@ class StonehengeState(GameState):
             s += self.leylines[0][i]
             s += " - "
             for b in range(len(self.board[i])):
-                if self.board[i][b].claim is None:
+                if self.claims[self.board[i][b].index] is None:
                     s += self.board[i][b].value
                 else:
-                    s += self.board[i][b].claim
+                    s += self.claims[self.board[i][b].index]
                 if b < (len(self.board[i])-1):
                     s += " - "
             if i == len(self.board)-1:
@@ -192,24 +134,30 @@ class StonehengeState(GameState):
         """
         possible_moves = []
 
-        for i in range(len(self.board)):
-            for b in range(len(self.board[i])):
-                if self.board[i][b].claim is None:
-                    possible_moves.append(self.board[i][b].value)
-
-        count1, count2 = 0, 0
-        for i in self.leylines:
-            for b in i:
-                if b == "1":
-                    count1 += 1
-                elif b == "2":
-                    count2 += 1
-
-        if count1 / (len(self.leylines) * len(self.leylines[0])) >= .5 or \
-                count2 / (len(self.leylines) * len(self.leylines[0])) >= .5:
+        for i, label in enumerate(self.topology.labels):
+            if self.claims[i] is None:
+                possible_moves.append(label)
+
+        if self.captured_leylines("p1") >= .5 or \
+                self.captured_leylines("p2") >= .5:
             possible_moves = []
         return possible_moves
 
+    def iter_possible_moves(self):
+        """
+        Yield the moves of get_possible_moves() one at a time, in the same
+        order.
+        >>> moves = StonehengeState(True, 2).iter_possible_moves()
+        >>> next(moves), next(moves)
+        ('A', 'B')
+        """
+        if self.captured_leylines("p1") >= .5 or \
+                self.captured_leylines("p2") >= .5:
+            return
+        for i, label in enumerate(self.topology.labels):
+            if self.claims[i] is None:
+                yield label
+
 
     def get_current_player_name(self) -> str:
         """
@@ -223,80 +171,120 @@ class StonehengeState(GameState):
             return 'p1'
         return 'p2'
 
-    def check_leylines(self, state, lst, pos):
+    def check_leyline(self, head, pos, i):
         """
-        Check through the leylines to see if a player has claimed it.
-        Helper function to split up code
+        Check whether a player has claimed the leyline starting at head,
+        number i in direction pos, updating its marker and the captured
+        leyline counters. Return whether the marker changed.
         """
-        for i in range(len(lst)):
-            p1, p2, count = 0, 0, 0
-            cur_node = lst[i]
-
-            while cur_node is not None:
-                count += 1
-                if cur_node.claim == "1":
-                    p1 += 1
-                elif cur_node.claim == "2":
-                    p2 += 1
-                if pos == 0:
-                    cur_node = cur_node.hori
-                elif pos == 1:
-                    cur_node = cur_node.left
-                elif pos == 2:
-                    cur_node = cur_node.right
-
+        p1, p2, count = 0, 0, 0
+        cur_node = head
 
-            if (p1 / count) >= .5 and state.leylines[pos][i] == '@':
-                state.leylines[pos][i] = "1"
-            elif (p2 / count) >= .5 and state.leylines[pos][i] == '@':
-                state.leylines[pos][i] = "2"
+        while cur_node is not None:
+            count += 1
+            if self.claims[cur_node.index] == "1":
+                p1 += 1
+            elif self.claims[cur_node.index] == "2":
+                p2 += 1
+            if pos == 0:
+                cur_node = cur_node.hori
+            elif pos == 1:
+                cur_node = cur_node.left
+            elif pos == 2:
+                cur_node = cur_node.right
 
+        if (p1 / count) >= .5 and self.leylines[pos][i] == '@':
+            self.leylines[pos][i] = "1"
+            self.p1_leylines += 1
+            return True
+        if (p2 / count) >= .5 and self.leylines[pos][i] == '@':
+            self.leylines[pos][i] = "2"
+            self.p2_leylines += 1
+            return True
+        return False
 
     def make_move(self, move) -> 'GameState':
         """
         Return the GameState that results from applying move to this GameState.
+
+        Only the claims and leyline markers are copied, and the move is
+        applied to the copy with apply_move().
         >>> new_state = StonehengeState(True, 2)
         >>> state = new_state.make_move("A")
-        >>> new_state.board == state.board
+        >>> new_state.claims == state.claims
         False
+        >>> state.leylines, state.p1_leylines
+        ([['1', '@', '@'], ['1', '@', '@'], ['@', '@', '@']], 2)
         """
-        #CREATES A NEW BOARD##
-        new_state = StonehengeState(not self.p1_turn, self.board_size)
-        #COPIES ALL THE OLD CELLS ONTO THE BOARD
-        for i in range(len(self.board)):
-            for b in range(len(self.board[i])):
-                new_state.board[i][b] = Cell.copy(self.board[i][b])
-        #APPLIES THE NEW MOVE TO THE NEW BOARD
-        for i in range(len(new_state.board)):
-            for b in range(len(new_state.board[i])):
-                if new_state.board[i][b].value == move:
-                    new_state.board[i][b].claim = \
-                        self.get_current_player_name()[1]
-
-        hori_nodes, left_nodes, right_nodes = \
-            [], [new_state.board[0][0]], [new_state.board[0][1]]
-        #COPYING THE OLD LEYLINES ONTO THE NEW BOARD
-        for i in range(len(new_state.leylines)):
-            for b in range(len(new_state.leylines[i])):
-                new_state.leylines[i][b] = self.leylines[i][b]
-        #LINKING THE LEYLINES TOGETHER
-        new_state.init_hori()
-        new_state.init_left()
-        new_state.init_right()
-        #ITERATING THROUGH TH EHEADS OF THE BOARD
-        for i in range(len(new_state.board)):
-            hori_nodes.append(new_state.board[i][0])
-        for i in range(len(new_state.board)-1):
-            left_nodes.append(new_state.board[i][len(new_state.board[i])-1])
-        for i in range(len(new_state.board)-1):
-            right_nodes.append(new_state.board[i][0])
-        #ITERATING THROUGH HORIZONTALLY AND CHECKING WHETHER IF CELLS
-        #ARE CLAIMED IN A LEYLINE
-        new_state.check_leylines(new_state, hori_nodes, 0)
-        new_state.check_leylines(new_state, left_nodes, 1)
-        new_state.check_leylines(new_state, right_nodes, 2)
+        new_state = StonehengeState.__new__(StonehengeState)
+        new_state.board_size = self.board_size
+        new_state.topology = self.topology
+        new_state.board = self.board
+        new_state.claims = self.claims.copy()
+        new_state.leylines = [direction.copy() for direction in self.leylines]
+        new_state.p1_leylines = self.p1_leylines
+        new_state.p2_leylines = self.p2_leylines
+        new_state.p1_turn = self.p1_turn
+        new_state.zobrist = self.zobrist
+        new_state.apply_move(move)
         return new_state
 
+    def apply_move(self, move):
+        """
+        Apply move to this state in place, and return what undo_move needs
+        to take it back: the index of the claimed cell and the leylines
+        whose markers it changed. Only the (at most three) leylines through
+        the claimed cell are checked, since no other leyline can change
+        hands.
+        >>> state = StonehengeState(True, 2)
+        >>> state.apply_move("A")
+        (0, [0, 3])
+        >>> state.leylines, state.get_current_player_name()
+        ([['1', '@', '@'], ['1', '@', '@'], ['@', '@', '@']], 'p2')
+        """
+        topology = self.topology
+        cell_number = topology.index.get(move)
+        changed = []
+        if cell_number is not None:
+            player = 0 if self.p1_turn else 1
+            self.claims[cell_number] = self.get_current_player_name()[1]
+            self.zobrist ^= topology.cell_keys[player][cell_number]
+            for line in topology.cell_leylines[cell_number]:
+                pos, i = divmod(line, self.board_size + 1)
+                if self.check_leyline(topology.heads[pos][i], pos, i):
+                    changed.append(line)
+                    self.zobrist ^= topology.line_keys[player][line]
+        self.p1_turn = not self.p1_turn
+        self.zobrist ^= topology.p1_turn_key
+        return cell_number, changed
+
+    def undo_move(self, undo):
+        """
+        Take back the move that apply_move returned undo for, which must be
+        the last move applied to this state.
+        >>> state = StonehengeState(True, 2)
+        >>> before = repr(state), str(state)
+        >>> state.undo_move(state.apply_move("A"))
+        >>> (repr(state), str(state)) == before
+        True
+        """
+        topology = self.topology
+        cell_number, changed = undo
+        self.p1_turn = not self.p1_turn
+        self.zobrist ^= topology.p1_turn_key
+        player = 0 if self.p1_turn else 1
+        if cell_number is not None:
+            self.claims[cell_number] = None
+            self.zobrist ^= topology.cell_keys[player][cell_number]
+        for line in changed:
+            pos, i = divmod(line, self.board_size + 1)
+            if self.leylines[pos][i] == "1":
+                self.p1_leylines -= 1
+            else:
+                self.p2_leylines -= 1
+            self.leylines[pos][i] = "@"
+            self.zobrist ^= topology.line_keys[player][line]
+
     def is_valid_move(self, move) -> bool:
         """
         Return whether move is a valid move for this GameState.
@@ -327,6 +315,108 @@ class StonehengeState(GameState):
         s += " has claimed {} percent of leylines".format(count)
         return s
 
+    def __eq__(self, other):
+        """
+        Return whether other is a StonehengeState of the same position:
+        the same board size, player to move, claims and leyline markers.
+        >>> new_state = StonehengeState(True, 2)
+        >>> one = new_state.make_move("A").make_move("D").make_move("G")
+        >>> two = new_state.make_move("G").make_move("D").make_move("A")
+        >>> one == two, one == new_state
+        (True, False)
+        >>> len({one, two, new_state})
+        2
+        """
+        return isinstance(other, StonehengeState) and \
+            self.zobrist == other.zobrist and \
+            self.board_size == other.board_size and \
+            self.p1_turn == other.p1_turn and self.claims == other.claims \
+            and self.leylines == other.leylines
+
+    def __hash__(self):
+        """
+        Return the Zobrist hash of this state's position.
+        >>> hash(StonehengeState(True, 2)) == hash(StonehengeState(True, 2))
+        True
+        """
+        return self.zobrist
+
+    def get_canonical_key(self):
+        """
+        Return the position key of the canonical representative of this
+        state's symmetry class.
+        >>> StonehengeState(True, 2).make_move("F").get_canonical_key()
+        (2, False, 1, 0, 9, 0)
+        """
+        return self.topology.canonicalize(self.get_position_key())[0]
+
+    @classmethod
+    def from_position_key(cls, key):
+        """
+        Return the StonehengeState whose get_position_key() is key.
+        >>> state = StonehengeState(True, 2).make_move("A").make_move("D")
+        >>> key = state.get_position_key()
+        >>> StonehengeState.from_position_key(key).get_position_key() == key
+        True
+        """
+        return BitboardStonehengeState.from_position_key(key)\
+            .to_stonehenge_state()
+
+    def __reduce__(self):
+        """
+        Pickle this state as its position key rather than as linked Cells.
+        >>> import pickle
+        >>> state = StonehengeState(True, 2).make_move("A")
+        >>> str(pickle.loads(pickle.dumps(state))) == str(state)
+        True
+        """
+        return StonehengeState.from_position_key, (self.get_position_key(),)
+
+    def get_position_key(self):
+        """
+        Return an exact, hashable key for this state: the board size, whose
+        turn it is, the cells claimed by each player and the leylines
+        claimed by each player, the last four as bitmasks.
+        >>> new_state = StonehengeState(True, 2)
+        >>> new_state.make_move("A").get_position_key()
+        (2, False, 1, 0, 9, 0)
+        >>> one = new_state.make_move("A").make_move("D").make_move("G")
+        >>> two = new_state.make_move("G").make_move("D").make_move("A")
+        >>> one.get_position_key() == two.get_position_key()
+        True
+        """
+        p1_cells, p2_cells, bit = 0, 0, 1
+        for claim in self.claims:
+            if claim == "1":
+                p1_cells |= bit
+            elif claim == "2":
+                p2_cells |= bit
+            bit <<= 1
+        p1_lines, p2_lines, bit = 0, 0, 1
+        for direction in self.leylines:
+            for marker in direction:
+                if marker == "1":
+                    p1_lines |= bit
+                elif marker == "2":
+                    p2_lines |= bit
+                bit <<= 1
+        return (self.board_size, self.p1_turn, p1_cells, p2_cells,
+                p1_lines, p2_lines)
+
+    def get_move_priorities(self):
+        """
+        Return a (tactical, contest) priority for each possible move, as
+        described in StonehengeTopology.move_priorities.
+        >>> state = StonehengeState(True, 2).make_move("A")
+        >>> state.get_move_priorities()["G"]
+        (7, 1)
+        """
+        if self.get_possible_moves() == []:
+            return {}
+        key = self.get_position_key()
+        mine, theirs = (key[2], key[3]) if self.p1_turn else (key[3], key[2])
+        return self.topology.move_priorities(mine, theirs, key[4] | key[5])
+
     def captured_leylines(self, player):
         """
         Returns the number of captured leyines for a given player
@@ -338,46 +428,763 @@ class StonehengeState(GameState):
         0.3333333333333333
         """
 
-        count = 0
-        for i in self.leylines:
-            for b in i:
-                if b == "1" and player == "p1":
-                    count += 1
-                elif b == "2" and player == "p2":
-                    count += 1
+        count = self.p1_leylines if player == "p1" else self.p2_leylines
         return count/(len(self.leylines)*len(self.leylines[0]))
 
     def rough_outcome(self) -> float:
         """
         Return an estimate in interval [LOSE, WIN] of best outcome the current
-        player can guarantee from state self.
+        player can guarantee from state self, worked out without making any
+        moves as StonehengeTopology.rough_outcome() describes.
         >>> new_state = StonehengeState(True, 2)
         >>> new_state.rough_outcome()
         0.0
         """
-        if self.get_possible_moves() == []:
-            return self.LOSE
-        for i in self.get_possible_moves():
-            new_state = self.make_move(i)
-            for b in new_state.get_possible_moves():
-                new_state2 = new_state.make_move(b)
-                if new_state2.get_possible_moves() == []:
-                    return self.LOSE
-            if new_state.get_possible_moves() == []:
-                return self.WIN
-        return self.captured_leylines(self.get_current_player_name())
+        key = self.get_position_key()
+        if self.p1_turn:
+            return self.topology.rough_outcome(*key[2:])
+        return self.topology.rough_outcome(key[3], key[2], key[5], key[4])
+
+class BoardSymmetry:
+    """
+    A symmetry of a Stonehenge board, mapping cells to cells and leylines
+    to leylines
+
+    labels - the cell labels, in the order of the cell bits
+    cells - the bit number each cell is mapped to
+    leylines - the number each leyline is mapped to
+    """
+    def __init__(self, labels, cells, leylines):
+        """
+        Initialize the BoardSymmetry sending cell i to cells[i] and leyline
+        i to leylines[i].
+        """
+        self.labels = labels
+        self.cells = cells
+        self.leylines = leylines
+        self._index = {label: i for i, label in enumerate(labels)}
+        self._inverse = {cells[i]: i for i in range(len(cells))}
+        self._cell_bytes = self.byte_tables(cells)
+        self._leyline_bytes = self.byte_tables(leylines)
+
+    @classmethod
+    def byte_tables(cls, images):
+        """
+        Return, for each byte of a mask of len(images) bits, the permuted
+        mask of every value of that byte, so masks can be permuted a byte
+        at a time.
+        """
+        full = (1 << len(images)) - 1
+        return [[cls.permute(value << shift & full, images)
+                 for value in range(256)]
+                for shift in range(0, len(images), 8)]
+
+    @staticmethod
+    def permute(mask, images):
+        """
+        Return mask with each set bit i moved to bit images[i].
+        >>> BoardSymmetry.permute(0b011, [2, 0, 1])
+        5
+        """
+        result = 0
+        while mask:
+            low = mask & -mask
+            result |= 1 << images[low.bit_length() - 1]
+            mask ^= low
+        return result
+
+    @staticmethod
+    def permute_bytes(mask, tables):
+        """
+        Return mask permuted with tables from byte_tables.
+        """
+        result = 0
+        for table in tables:
+            result |= table[mask & 255]
+            mask >>= 8
+        return result
+
+    def apply_cells(self, mask):
+        """
+        Return the cell mask that mask maps to.
+        """
+        return self.permute_bytes(mask, self._cell_bytes)
+
+    def apply(self, key):
+        """
+        Return the position key of the position key maps to.
+        """
+        return (key[0], key[1], self.permute_bytes(key[2], self._cell_bytes),
+                self.permute_bytes(key[3], self._cell_bytes),
+                self.permute_bytes(key[4], self._leyline_bytes),
+                self.permute_bytes(key[5], self._leyline_bytes))
+
+    def map_move(self, move):
+        """
+        Return the cell label that move's cell is mapped to.
+        """
+        return self.labels[self.cells[self._index[move]]]
+
+    def unmap_move(self, move):
+        """
+        Return the cell label that is mapped to move's cell.
+        """
+        return self.labels[self._inverse[self._index[move]]]
+
+
+class StonehengeTopology:
+    """
+    The parts of a Stonehenge board that only depend on its size
+
+    board - the rows of linked Cells, shared by every StonehengeState
+    labels - the cell labels, in the order of the cell bits
+    index - maps a cell label to its bit number
+    heads - the first Cell of every leyline, as in leyline_heads()
+    leylines - a bitmask of the cells on each leyline, for the horizontal,
+               left and right directions in turn
+    leyline_sizes - the number of cells on each leyline
+    cell_leylines - the numbers of the leylines through each cell
+    symmetries - the BoardSymmetry objects of the board, identity first
+    cell_keys - the Zobrist keys of each cell claimed by p1, then by p2
+    line_keys - the Zobrist keys of each leyline claimed by p1, then by p2
+    p1_turn_key - the Zobrist key of p1 being the player to move
+    """
+    def __init__(self, board_size):
+        """
+        Build and link the Cells of a board of board_size, and work out its
+        leylines by walking them.
+        >>> topology = StonehengeTopology(1)
+        >>> topology.labels
+        ['A', 'B', 'C']
+        >>> topology.leylines
+        [3, 4, 1, 6, 2, 5]
+        >>> topology.cell_leylines[2]
+        (1, 3, 5)
+        """
+        self.board_size = board_size
+        self.board = []
+        counter = 65
+        for i in range(board_size+1):
+            self.board.append([])
+        size = 2
+        for i in range(board_size+1):
+            for _ in range(size):
+                self.board[i].append(Cell(chr(counter)))
+                counter += 1
+            if size == board_size + 1:
+                size -= 1
+            else:
+                size += 1
+        self.init_hori()
+        self.init_left()
+        self.init_right()
+        self.labels = [cell.value for row in self.board for cell in row]
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        for row in self.board:
+            for cell in row:
+                cell.index = self.index[cell.value]
+        self.heads = self.leyline_heads()
+        self.leylines = []
+        for pos, heads in enumerate(self.heads):
+            for head in heads:
+                mask = 0
+                cur_node = head
+                while cur_node is not None:
+                    mask |= 1 << self.index[cur_node.value]
+                    cur_node = [cur_node.hori, cur_node.left,
+                                cur_node.right][pos]
+                self.leylines.append(mask)
+        self.leyline_sizes = [mask.bit_count() for mask in self.leylines]
+        self.cell_leylines = [tuple(i for i, mask in enumerate(self.leylines)
+                                    if mask >> cell & 1)
+                              for cell in range(len(self.labels))]
+        self.full_board = (1 << len(self.labels)) - 1
+        self.symmetries = self.find_symmetries()
+        # Seeded by board size, so that hashes agree between processes
+        keys = random.Random(board_size)
+        self.cell_keys = [[keys.getrandbits(64) for _ in self.labels]
+                          for _ in range(2)]
+        self.line_keys = [[keys.getrandbits(64) for _ in self.leylines]
+                          for _ in range(2)]
+        self.p1_turn_key = keys.getrandbits(64)
+
+    def init_hori(self):
+        """
+        Links up the leylines from left to right
+        >>> topology = get_topology(2)
+        >>> str(topology.board[0][0].hori)
+        'Cell: B '
+        """
+        for i in range(len(self.board)):
+            for b in range(len(self.board[i])-1):
+                self.board[i][b].hori = self.board[i][b+1]
+
+    def init_left(self):
+        """
+        Links up the leylines from top right to bottom left
+        >>> topology = get_topology(2)
+        >>> str(topology.board[0][0].left)
+        'Cell: C '
+        """
+        for i in range(len(self.board) - 2):
+            self.board[i][0].left = self.board[i+1][0]
+        for i in range(1, len(self.board)):
+            for b in range(-1 + i, len(self.board) - 2):
+                self.board[b][i].left = self.board[b+1][i]
+            self.board[len(self.board)-2][i].left =\
+                self.board[len(self.board)-1][i-1]
+
+    def init_right(self):
+        """
+        Links up the leyliens from top left to bottom right
+        >>> topology = get_topology(2)
+        >>> str(topology.board[0][0].right)
+        'Cell: D '
+        """
+        for i in range(1, len(self.board)-1):
+            self.board[i-1][i].right = self.board[i][i+1]
+        for i in range(len(self.board)-1):
+            for b in range(i, len(self.board)-2):
+                self.board[b][b-i].right = self.board[b+1][b-i+1]
+            self.board[len(self.board)-2][len(self.board)- 2 - i].right =\
+            self.board[len(self.board)-1][len(self.board)-i-2]
+
+    def leyline_heads(self):
+        """
+        Return the first cell of every leyline, as three lists for the
+        horizontal, left and right directions in the order of
+        StonehengeState.leylines
+        >>> topology = get_topology(2)
+        >>> [str(head) for head in topology.leyline_heads()[1]]
+        ['Cell: A ', 'Cell: B ', 'Cell: E ']
+        """
+        hori_nodes, left_nodes, right_nodes = \
+            [], [self.board[0][0]], [self.board[0][1]]
+        for i in range(len(self.board)):
+            hori_nodes.append(self.board[i][0])
+        for i in range(len(self.board)-1):
+            left_nodes.append(self.board[i][len(self.board[i])-1])
+        for i in range(len(self.board)-1):
+            right_nodes.append(self.board[i][0])
+        return [hori_nodes, left_nodes, right_nodes]
+
+    def find_symmetries(self):
+        """
+        Return every BoardSymmetry of the board, identity first.
+
+        A symmetry sends each leyline direction to a direction, keeping or
+        reversing the order of its leylines; each candidate is kept if it
+        maps every cell and every leyline onto one.
+        >>> len(get_topology(2).symmetries), len(get_topology(3).symmetries)
+        (12, 6)
+        """
+        lines = self.board_size + 1
+        cell_of = {self.cell_leylines[cell]: cell
+                   for cell in range(len(self.labels))}
+        found = []
+        for directions in permutations(range(3)):
+            for flips in product((False, True), repeat=3):
+                leylines = []
+                for line in range(len(self.leylines)):
+                    pos, i = divmod(line, lines)
+                    if flips[pos]:
+                        i = lines - 1 - i
+                    leylines.append(directions[pos] * lines + i)
+                cells = [cell_of.get(tuple(sorted(leylines[line]
+                                                  for line in through)))
+                         for through in self.cell_leylines]
+                if None in cells or len(set(cells)) != len(cells):
+                    continue
+                if all(BoardSymmetry.permute(mask, cells) ==
+                       self.leylines[leylines[line]]
+                       for line, mask in enumerate(self.leylines)):
+                    found.append(BoardSymmetry(self.labels, cells, leylines))
+        return found
+
+    def zobrist_hash(self, key):
+        """
+        Return the 64-bit Zobrist hash of the position with position key
+        key: the XOR of the keys of its claimed cells and leylines, and of
+        p1_turn_key if p1 is to move.
+        >>> topology = get_topology(1)
+        >>> topology.zobrist_hash((1, True, 0, 0, 0, 0)) == \
+                topology.p1_turn_key
+        True
+        """
+        hashed = self.p1_turn_key if key[1] else 0
+        for keys, mask in ((self.cell_keys[0], key[2]),
+                           (self.cell_keys[1], key[3]),
+                           (self.line_keys[0], key[4]),
+                           (self.line_keys[1], key[5])):
+            while mask:
+                low = mask & -mask
+                hashed ^= keys[low.bit_length() - 1]
+                mask ^= low
+        return hashed
+
+    def canonicalize(self, key):
+        """
+        Return the smallest position key that a symmetry maps key to, and
+        that BoardSymmetry.
+        >>> topology = get_topology(2)
+        >>> state = StonehengeState(True, 2)
+        >>> a = topology.canonicalize(state.make_move("A").get_position_key())
+        >>> b = topology.canonicalize(state.make_move("F").get_position_key())
+        >>> a[0] == b[0]
+        True
+        """
+        best, best_symmetry = key, self.symmetries[0]
+        for symmetry in self.symmetries[1:]:
+            if symmetry.apply_cells(key[2]) > best[2]:
+                continue
+            image = symmetry.apply(key)
+            if image < best:
+                best, best_symmetry = image, symmetry
+        return best, best_symmetry
+
+    def captures(self, mine, theirs, claimed_lines):
+        """
+        Return a list of each free cell's number and a bitmask of the
+        leylines the player holding the cells mine would capture by
+        claiming it, given the other player's cells (theirs) and the
+        claimed leylines, all as bitmasks.
+        >>> topology = get_topology(1)
+        >>> topology.captures(0b001, 0b000, 0b100101)
+        [(1, 24), (2, 10)]
+        """
+        found = []
+        free = self.full_board & ~(mine | theirs)
+        while free:
+            low = free & -free
+            free ^= low
+            cell = low.bit_length() - 1
+            captured = 0
+            for line in self.cell_leylines[cell]:
+                if not claimed_lines >> line & 1 and \
+                        ((mine & self.leylines[line]).bit_count() + 1) * 2 \
+                        >= self.leyline_sizes[line]:
+                    captured |= 1 << line
+            found.append((cell, captured))
+        return found
+
+    def rough_outcome(self, mine, theirs, my_lines, their_lines):
+        """
+        Return StonehengeState.rough_outcome() for the position where the
+        player to move holds the cells mine and leylines my_lines, and the
+        other player theirs and their_lines, all as bitmasks.
+
+        Works from which leylines each free cell would capture rather than
+        by making the moves: trying the moves in order, it is WIN if the
+        move captures enough leylines to win, and LOSE if, after it, some
+        reply captures enough for the other player to win.
+        >>> get_topology(2).rough_outcome(0b0000000, 0b0000001, 0, 0b000001001)
+        -1
+        """
+        total = len(self.leylines)
+        my_count, their_count = my_lines.bit_count(), their_lines.bit_count()
+        if my_count * 2 >= total or their_count * 2 >= total or \
+                mine | theirs == self.full_board:
+            return GameState.LOSE
+        claimed = my_lines | their_lines
+        need = (total + 1) // 2 - their_count
+        threats = [(cell, captured) for cell, captured
+                   in self.captures(theirs, mine, claimed)
+                   if captured.bit_count() >= need]
+        for cell, captured in self.captures(mine, theirs, claimed):
+            if (my_count + captured.bit_count()) * 2 >= total:
+                return GameState.WIN
+            for reply, reply_captured in threats:
+                if reply != cell and \
+                        (reply_captured & ~captured).bit_count() >= need:
+                    return GameState.LOSE
+        return my_count / total
+
+    def move_priorities(self, mine, theirs, claimed_lines):
+        """
+        Return a (tactical, contest) priority for each free cell's label,
+        given the cells of the player to move (mine), of the other player
+        (theirs) and the claimed leylines, all as bitmasks.
+
+        tactical counts 2 for each leyline the cell would capture and 1 for
+        each leyline it would stop the other player capturing; contest is
+        the number of claimed cells on the unclaimed leylines through it.
+        >>> topology = get_topology(2)
+        >>> topology.move_priorities(0b0001000, 0b0000001, 0b000001001)
+        {'B': (5, 1), 'C': (5, 1), 'E': (8, 1), 'F': (8, 1), 'G': (9, 2)}
+        """
+        priorities = {}
+        free = self.full_board & ~(mine | theirs)
+        for cell, label in enumerate(self.labels):
+            if not free >> cell & 1:
+                continue
+            tactical, contest = 0, 0
+            for line in self.cell_leylines[cell]:
+                if claimed_lines >> line & 1:
+                    continue
+                mask, size = self.leylines[line], self.leyline_sizes[line]
+                my_count = (mine & mask).bit_count()
+                their_count = (theirs & mask).bit_count()
+                if (my_count + 1) * 2 >= size:
+                    tactical += 2
+                if (their_count + 1) * 2 >= size:
+                    tactical += 1
+                contest += my_count + their_count
+            priorities[label] = (tactical, contest)
+        return priorities
+
+
+_TOPOLOGIES = {}
+
+
+def canonicalize(state):
+    """
+    Return the canonical representative of state's symmetry class, a state
+    of the same class, and the BoardSymmetry mapping state onto it. A move
+    m of the representative is the move symmetry.unmap_move(m) of state.
+    >>> state = StonehengeState(True, 2).make_move("F")
+    >>> canonical, symmetry = canonicalize(state)
+    >>> canonical.get_position_key()
+    (2, False, 1, 0, 9, 0)
+    >>> symmetry.unmap_move("A")
+    'F'
+    """
+    key, symmetry = get_topology(state.board_size).canonicalize(
+        state.get_position_key())
+    return type(state).from_position_key(key), symmetry
+
+
+def get_topology(board_size):
+    """
+    Return the StonehengeTopology for board_size, building it only the
+    first time it is asked for.
+    >>> get_topology(2) is get_topology(2)
+    True
+    """
+    if board_size not in _TOPOLOGIES:
+        _TOPOLOGIES[board_size] = StonehengeTopology(board_size)
+    return _TOPOLOGIES[board_size]
+
+
+class BitboardStonehengeState(GameState):
+    """
+    A compact state of the Stonehenge Game
+
+    The cells claimed by each player and the leylines claimed by each player
+    are stored as integer bitmasks, numbered as in the board's
+    StonehengeTopology.
+    """
+    def __init__(self, is_p1_turn: bool, board_size) -> None:
+        """
+        Initialize an empty board of board_size, with p1 to move if
+        is_p1_turn.
+        >>> new_state = BitboardStonehengeState(True, 2)
+        >>> new_state.get_possible_moves()
+        ['A', 'B', 'C', 'D', 'E', 'F', 'G']
+        """
+        self.p1_turn = is_p1_turn
+        self.board_size = board_size
+        self.topology = get_topology(board_size)
+        self.p1_cells = 0
+        self.p2_cells = 0
+        self.p1_lines = 0
+        self.p2_lines = 0
+
+    @classmethod
+    def from_position_key(cls, key):
+        """
+        Return the BitboardStonehengeState whose get_position_key() is key.
+        >>> state = StonehengeState(True, 2).make_move("A").make_move("D")
+        >>> key = state.get_position_key()
+        >>> BitboardStonehengeState.from_position_key(key).get_position_key() \
+                == key
+        True
+        """
+        new_state = cls(key[1], key[0])
+        new_state.p1_cells, new_state.p2_cells, new_state.p1_lines, \
+            new_state.p2_lines = key[2:]
+        return new_state
+
+    def to_stonehenge_state(self):
+        """
+        Return the equivalent StonehengeState.
+        >>> state = BitboardStonehengeState(True, 2).make_move("A")
+        >>> state.to_stonehenge_state().get_position_key() == \
+                state.get_position_key()
+        True
+        """
+        state = StonehengeState(self.p1_turn, self.board_size)
+        for cell in range(len(state.claims)):
+            if self.p1_cells >> cell & 1:
+                state.claims[cell] = "1"
+            elif self.p2_cells >> cell & 1:
+                state.claims[cell] = "2"
+        bit = 1
+        for direction in state.leylines:
+            for i in range(len(direction)):
+                if self.p1_lines & bit:
+                    direction[i] = "1"
+                elif self.p2_lines & bit:
+                    direction[i] = "2"
+                bit <<= 1
+        state.p1_leylines = self.p1_lines.bit_count()
+        state.p2_leylines = self.p2_lines.bit_count()
+        state.zobrist = self.zobrist
+        return state
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the current state of the game.
+        >>> state = BitboardStonehengeState(True, 2).make_move("A")
+        >>> str(state) == str(StonehengeState(True, 2).make_move("A"))
+        True
+        """
+        return str(self.to_stonehenge_state())
+
+    def is_over(self):
+        """
+        Return whether a player has claimed at least half of the leylines.
+        """
+        total = len(self.topology.leylines)
+        return self.p1_lines.bit_count() * 2 >= total or \
+            self.p2_lines.bit_count() * 2 >= total
+
+    def get_possible_moves(self) -> list:
+        """
+        Return all possible moves that can be applied to this state.
+        >>> state = BitboardStonehengeState(True, 1).make_move("C")
+        >>> state.get_possible_moves()
+        []
+        """
+        if self.is_over():
+            return []
+        free = self.topology.full_board & ~(self.p1_cells | self.p2_cells)
+        return [label for i, label in enumerate(self.topology.labels)
+                if free >> i & 1]
+
+    def iter_possible_moves(self):
+        """
+        Yield the moves of get_possible_moves() one at a time, in the same
+        order, finding each free cell from the lowest bit left.
+        >>> moves = BitboardStonehengeState(True, 2).make_move("A")
+        >>> list(moves.iter_possible_moves())
+        ['B', 'C', 'D', 'E', 'F', 'G']
+        """
+        if self.is_over():
+            return
+        labels = self.topology.labels
+        free = self.topology.full_board & ~(self.p1_cells | self.p2_cells)
+        while free:
+            low = free & -free
+            yield labels[low.bit_length() - 1]
+            free ^= low
+
+    def make_move(self, move) -> 'GameState':
+        """
+        Return the GameState that results from applying move to this GameState.
+        >>> state = BitboardStonehengeState(True, 2).make_move("A")
+        >>> state.get_current_player_name(), state.p1_cells, state.p1_lines
+        ('p2', 1, 9)
+        """
+        new_state = BitboardStonehengeState.__new__(BitboardStonehengeState)
+        new_state.p1_turn = self.p1_turn
+        new_state.board_size = self.board_size
+        new_state.topology = self.topology
+        new_state.p1_cells, new_state.p2_cells = self.p1_cells, self.p2_cells
+        new_state.p1_lines, new_state.p2_lines = self.p1_lines, self.p2_lines
+        new_state.apply_move(move)
+        return new_state
+
+    def apply_move(self, move):
+        """
+        Apply move to this state in place, and return what undo_move needs
+        to take it back: the bit of the claimed cell and the bits of the
+        leylines it captured.
+        >>> state = BitboardStonehengeState(True, 2)
+        >>> state.apply_move("A")
+        (1, 9)
+        """
+        topology = self.topology
+        cell_number = topology.index[move]
+        cell = 1 << cell_number
+        if self.p1_turn:
+            self.p1_cells |= cell
+            mine = self.p1_cells
+        else:
+            self.p2_cells |= cell
+            mine = self.p2_cells
+        claimed = self.p1_lines | self.p2_lines
+        gained = 0
+        for line in topology.cell_leylines[cell_number]:
+            if not claimed >> line & 1 and \
+                    (mine & topology.leylines[line]).bit_count() * 2 >= \
+                    topology.leyline_sizes[line]:
+                gained |= 1 << line
+        if self.p1_turn:
+            self.p1_lines |= gained
+        else:
+            self.p2_lines |= gained
+        self.p1_turn = not self.p1_turn
+        return cell, gained
+
+    def undo_move(self, undo):
+        """
+        Take back the move that apply_move returned undo for, which must be
+        the last move applied to this state.
+        >>> state = BitboardStonehengeState(True, 2)
+        >>> state.undo_move(state.apply_move("A"))
+        >>> state.get_position_key()
+        (2, True, 0, 0, 0, 0)
+        """
+        cell, gained = undo
+        self.p1_turn = not self.p1_turn
+        if self.p1_turn:
+            self.p1_cells &= ~cell
+            self.p1_lines &= ~gained
+        else:
+            self.p2_cells &= ~cell
+            self.p2_lines &= ~gained
+
+    def __repr__(self):
+        """
+        Return a representation of this state (which can be used for
+        equality testing).
+        >>> repr(BitboardStonehengeState(True, 2))
+        'p1 has claimed 0.0 percent of leylines'
+        """
+        s = self.get_current_player_name()
+        count = self.captured_leylines(s)
+        s += " has claimed {} percent of leylines".format(count)
+        return s
+
+    def __reduce__(self):
+        """
+        Pickle this state as its position key, leaving out the topology.
+        >>> import pickle
+        >>> state = BitboardStonehengeState(True, 2).make_move("A")
+        >>> pickle.loads(pickle.dumps(state)).get_position_key()
+        (2, False, 1, 0, 9, 0)
+        """
+        return BitboardStonehengeState.from_position_key, \
+            (self.get_position_key(),)
+
+    def __eq__(self, other):
+        """
+        Return whether other is a BitboardStonehengeState of the same
+        position.
+        >>> new_state = BitboardStonehengeState(True, 2)
+        >>> one = new_state.make_move("A").make_move("D").make_move("G")
+        >>> two = new_state.make_move("G").make_move("D").make_move("A")
+        >>> one == two, one == new_state
+        (True, False)
+        """
+        return isinstance(other, BitboardStonehengeState) and \
+            self.get_position_key() == other.get_position_key()
+
+    def __hash__(self):
+        """
+        Return the Zobrist hash of this state's position, the same as that
+        of the equivalent StonehengeState.
+        >>> state = BitboardStonehengeState(True, 2).make_move("A")
+        >>> hash(state) == hash(state.to_stonehenge_state())
+        True
+        """
+        return self.zobrist
+
+    @property
+    def zobrist(self):
+        """
+        The Zobrist hash of this state's position. The bitmasks make it
+        cheap to work out when asked for, so unlike StonehengeState's it is
+        not kept up to date by every move.
+        """
+        return self.topology.zobrist_hash(self.get_position_key())
+
+    def get_canonical_key(self):
+        """
+        Return the position key of the canonical representative of this
+        state's symmetry class.
+        >>> BitboardStonehengeState(True, 2).make_move("F").get_canonical_key()
+        (2, False, 1, 0, 9, 0)
+        """
+        return self.topology.canonicalize(self.get_position_key())[0]
+
+    def get_position_key(self):
+        """
+        Return an exact, hashable key for this state, in the same format as
+        StonehengeState.get_position_key().
+        >>> BitboardStonehengeState(True, 2).make_move("A").get_position_key()
+        (2, False, 1, 0, 9, 0)
+        """
+        return (self.board_size, self.p1_turn, self.p1_cells, self.p2_cells,
+                self.p1_lines, self.p2_lines)
+
+    def get_move_priorities(self):
+        """
+        Return a (tactical, contest) priority for each possible move, as
+        described in StonehengeTopology.move_priorities.
+        >>> state = BitboardStonehengeState(True, 2).make_move("A")
+        >>> state.get_move_priorities()["G"]
+        (7, 1)
+        """
+        if self.is_over():
+            return {}
+        if self.p1_turn:
+            mine, theirs = self.p1_cells, self.p2_cells
+        else:
+            mine, theirs = self.p2_cells, self.p1_cells
+        return self.topology.move_priorities(mine, theirs,
+                                             self.p1_lines | self.p2_lines)
+
+    def captured_leylines(self, player):
+        """
+        Returns the fraction of leylines captured by player
+        >>> new_state = BitboardStonehengeState(True, 2)
+        >>> new_state = new_state.make_move("A")
+        >>> new_state = new_state.make_move("B")
+        >>> new_state = new_state.make_move("C")
+        >>> new_state.captured_leylines("p1")
+        0.3333333333333333
+        """
+        lines = self.p1_lines if player == "p1" else self.p2_lines
+        return lines.bit_count() / len(self.topology.leylines)
+
+    def rough_outcome(self) -> float:
+        """
+        Return an estimate in interval [LOSE, WIN] of best outcome the current
+        player can guarantee from state self, worked out without making any
+        moves as StonehengeTopology.rough_outcome() describes.
+        >>> new_state = BitboardStonehengeState(True, 2)
+        >>> new_state.rough_outcome()
+        0.0
+        """
+        if self.p1_turn:
+            return self.topology.rough_outcome(self.p1_cells, self.p2_cells,
+                                               self.p1_lines, self.p2_lines)
+        return self.topology.rough_outcome(self.p2_cells, self.p1_cells,
+                                           self.p2_lines, self.p1_lines)
+
 
 class StonehengeGame(Game):
     """
     Abstract class for a game to be played with two players.
+
+    state_class - the GameState class used for the board
     """
-    def __init__(self, p1_starts):
+    state_class = StonehengeState
 
-        x = "e"
+    def __init__(self, p1_starts, board_size=None):
+        """
+        Initialize a game of Stonehenge on a board of board_size, asking
+        for the size if board_size is None.
+        >>> game = StonehengeGame(True, 2)
+        >>> game.current_state.get_possible_moves()
+        ['A', 'B', 'C', 'D', 'E', 'F', 'G']
+        """
+        x = "e" if board_size is None else str(board_size)
         while not x.isnumeric():
             x = input("Enter the size of the board")
         x = int(x)
-        self.current_state = StonehengeState(p1_starts, x)
+        self.current_state = self.state_class(p1_starts, x)
 
     def get_instructions(self) -> str:
         """
@@ -390,32 +1197,19 @@ class StonehengeGame(Game):
         """
         Return whether or not this game is over at state.
         """
-        count1 = 0
-        count2 = 0
-        for i in state.leylines:
-            for b in i:
-                if b == "1":
-                    count1 += 1
-                elif b == "2":
-                    count2 += 1
-
-        if count1/(len(state.leylines)*len(state.leylines[0])) >= .5 or\
-            count2/(len(state.leylines)*len(state.leylines[0])) >= .5:
-            return True
-        return False
+        return state.captured_leylines('p1') >= .5 or \
+            state.captured_leylines('p2') >= .5
 
-    def is_winner(self, player: str) -> bool:
+    def is_winner(self, player: str, state: GameState = None) -> bool:
         """
-        Return whether player has won the game.
+        Return whether player has won the game at state, or at
+        self.current_state if state is None.
 
         Precondition: player is 'p1' or 'p2'.
         """
-        if player == 'p1'and self.current_state.captured_leylines('p1') >= .5:
-            return True
-        elif player == 'p2' and \
-                self.current_state.captured_leylines('p2') >= .5:
-            return True
-        return False
+        if state is None:
+            state = self.current_state
+        return state.captured_leylines(player) >= .5
 
     def str_to_move(self, string: str):
         """
@@ -428,6 +1222,13 @@ class StonehengeGame(Game):
         return -1
 
 
+class BitboardStonehengeGame(StonehengeGame):
+    """
+    Stonehenge played on a BitboardStonehengeState
+    """
+    state_class = BitboardStonehengeState
+
+
 if __name__ == "__main__":
     from python_ta import check_all
     check_all(config="a2_pyta.txt")
\ No newline at end of file
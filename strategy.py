@@ -6,10 +6,34 @@ Adjust the type annotations as needed, and implement both a recursive
 and an iterative version of minimax.
 """
 from typing import Any
-import copy
+from concurrent.futures import ProcessPoolExecutor, wait
+import multiprocessing
+import os
+import time
 from stack import Stack
-from tree import Tree
+from array_tree import ArrayTree, UNSCORED, state_key
+from transposition import TranspositionTable
+from solved_db import load_databases, solved_move
+from game_wrapper import CancellableGame, SearchCancelled
 
+# Scores of solved positions, keyed by get_canonical_key() (so symmetric
+# positions share an entry) and stored from the point of view of the player
+# whose turn it is. The minimax strategies share it, and since the scores
+# are exact it stays valid between moves.
+TABLE_SIZE = 200000
+TABLE = TranspositionTable(TABLE_SIZE)
+INFINITY = float('inf')
+# The solved-position databases found in solved_db.SOLVED_DIR, keyed by
+# board size, which the minimax strategies answer from before searching
+SOLVED = load_databases()
+# Number of processes minimax_parallel_strategy spreads the root moves over
+WORKERS = os.cpu_count() or 1
+# Seconds iterative_deepening_strategy may spend choosing a move
+TIME_LIMIT = 1.0
+# Positions proof_number_strategy may expand looking for a forced win
+PN_BUDGET = 20000
+# A proof or disproof number that no search can reach
+PN_INFINITY = 10**9
 
 
 # TODO: Adjust the type annotation as needed.
@@ -60,109 +84,906 @@ def rough_outcome_strategy(game: Any) -> Any:
     return best_move
 
 
-# TODO: Implement a recursive version of the minimax strategy.
-def minimax_recursive_strategy(game: Any) -> Any:
+def minimax_recursive_strategy(game: Any,
+                               table: TranspositionTable = TABLE) -> Any:
     """
-    Recursively finds the best possible move for the player
+    Recursively finds the best possible move for the player, using
+    alpha-beta pruning
     """
+    return alphabeta_move(game, go_through, table, MoveOrderer())
 
-    moves = game.current_state.get_possible_moves()
-    dope = []
-    for i in moves:
-        new_game = copy.deepcopy(game)
-        current_player = new_game.current_state.get_current_player_name()
-        new_state = game.current_state.make_move(i)
-        new_game.current_state = new_state
-        x = go_through(new_game, new_state, current_player)
-        dope.append(x)
-
-    for i in range(len(moves)):
-        if dope[i] == 1:
-            return moves[i]
-    for i in range(len(moves)):
-        if dope[i] == 0:
-            return moves[i]
-    for i in range(len(moves)):
-        if dope[i] == -1:
-            return moves[i]
 
-    return None
+def alphabeta_move(game, search, table=TABLE, orderer=None):
+    """
+    Return the first move of game.current_state with the best minimax score,
+    scoring each move with search (go_through or iterative_alphabeta).
+
+    Each move after the first only has to be proven better than the best
+    one so far, and a winning move is returned without looking further.
+    This picks the same move as scoring every move with full minimax, so
+    orderer only reorders the moves below the root. A position in one of
+    the SOLVED databases is answered from it without searching.
+    """
+    state = game.current_state
+    move = solved_move(SOLVED, state)
+    if move is not None:
+        return move
+    best_move, best_score = None, -INFINITY
+    for move in state.get_possible_moves():
+        score = -1*search(game, state.make_move(move), -INFINITY,
+                          -best_score, table, orderer, 1)
+        if score > best_score:
+            best_move, best_score = move, score
+        if best_score == state.WIN:
+            break
+    return best_move
+
+
+def store_exact(table, state, key, score, alpha, beta):
+    """
+    Save score for key in table if it is the exact minimax score of state,
+    given that it was searched with the window (alpha, beta).
 
-def go_through(game, state, current_player):
+    A score at or above beta is only a lower bound, unless it is WIN, which
+    nothing can beat; one at or below alpha is only an upper bound, unless
+    it is LOSE, which nothing can fall below.
+    """
+    if alpha < score < beta or (score >= beta and score == state.WIN) \
+            or (score <= alpha and score == state.LOSE):
+        table.store(key, score)
+
+
+class MoveOrderer:
+    """
+    Puts the moves of a search in a promising order: by the state's
+    get_move_priorities(), then killer moves, then the history table.
+
+    killers - for each ply, the last two moves that caused a cutoff there
+    history - for each move, the total weight of the cutoffs it caused
+    """
+    def __init__(self):
+        """
+        Initialize a MoveOrderer with empty killer and history tables.
+        """
+        self.killers = {}
+        self.history = {}
+
+    def order(self, state, moves, ply):
+        """
+        Return moves of state, ply moves below the root, best first.
+        """
+        priorities = state.get_move_priorities()
+        killers = self.killers.get(ply, [])
+        return sorted(moves, reverse=True, key=lambda move: (
+            priorities.get(move, 0), move in killers,
+            self.history.get(move, 0)))
+
+    def record_cutoff(self, move, ply, weight):
+        """
+        Record that move caused a cutoff ply moves below the root, in a
+        subtree of about weight moves deep.
+        """
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[move] = self.history.get(move, 0) + weight * weight
+
+
+def go_through(game, state, alpha, beta, table=TABLE, orderer=None, ply=0):
     """
     Helper function for the minimax_recursive_strategy
+
+    Returns the alpha-beta (negamax) score of state for the player whose
+    turn it is. The result is exact if it lies strictly between alpha and
+    beta, and otherwise a bound on the exact score on the same side. Exact
+    scores are looked up in and saved to table. If orderer is given it
+    orders the moves of state, which is ply moves below the root. The
+    remaining moves are skipped once one wins, since nothing beats WIN.
     """
-    game.current_state = state
+    key = state.get_canonical_key()
+    score = table.lookup(key)
+    if score is not None:
+        return score
     if game.is_over(state):
-        if game.is_winner(current_player):
-            return state.WIN
-        elif not game.is_winner(current_player):
-            return state.LOSE
-        return state.DRAW
-    new_game = copy.deepcopy(game)
-    return -1*max([go_through(new_game, state.make_move(i),\
-                              state.get_current_player_name()) \
-                   for i in state.get_possible_moves()])
-
-def minimax_iterative_strategy(game: Any) -> Any:
+        score = game.get_score(state)
+        table.store(key, score)
+        return score
+    best = -INFINITY
+    original_alpha = alpha
+    moves = state.get_possible_moves()
+    if orderer is not None:
+        moves = orderer.order(state, moves, ply)
+    for move in moves:
+        score = -1*go_through(game, state.make_move(move), -beta, -alpha,
+                              table, orderer, ply + 1)
+        best = max(best, score)
+        alpha = max(alpha, score)
+        if alpha >= beta or best == state.WIN:
+            if orderer is not None:
+                orderer.record_cutoff(move, ply, len(moves))
+            break
+    store_exact(table, state, key, best, original_alpha, beta)
+    return best
+
+
+class SearchFrame:
     """
-    Iteratively finds the best possible move for the player
+    One position on the explicit stack of iterative_alphabeta
+
+    state - the position being searched
+    alpha, beta - its search window, alpha rising as children are scored
+    original_alpha - alpha before any children were scored
+    best - the best child score so far
+    moves - the moves of state, or None until the frame is first visited
+    index - the number of moves already searched
+    ply - how many moves below the root state is
+    """
+    def __init__(self, state, alpha, beta, ply=0):
+        """
+        Initialize a SearchFrame for state searched with window (alpha, beta)
+        """
+        self.state = state
+        self.ply = ply
+        self.alpha = alpha
+        self.beta = beta
+        self.original_alpha = alpha
+        self.best = -INFINITY
+        self.moves = None
+        self.index = 0
+
+
+def iterative_alphabeta(game, state, alpha, beta, table=TABLE, orderer=None,
+                        ply=0):
+    """
+    Return the same score as go_through(game, state, alpha, beta, table,
+    orderer, ply), searching with a Stack of SearchFrames instead of
+    recursion.
+    >>> from stonehenge import StonehengeGame
+    >>> game = StonehengeGame(True, 2)
+    >>> state = game.current_state.make_move("A")
+    >>> iterative_alphabeta(game, state, -INFINITY, INFINITY,
+    ...                     TranspositionTable(1000), MoveOrderer())
+    -1
+    >>> bound = go_through(game, state, -INFINITY, -1,
+    ...                    TranspositionTable(1000))
+    >>> iterative_alphabeta(game, state, -INFINITY, -1,
+    ...                     TranspositionTable(1000)) == bound
+    True
+    """
+    stack = Stack()
+    stack.add(SearchFrame(state, alpha, beta, ply))
+    returned = None
+    while not stack.is_empty():
+        frame = stack.remove()
+        key = frame.state.get_canonical_key()
+        if frame.moves is None:
+            returned = table.lookup(key)
+            if returned is not None:
+                continue
+            if game.is_over(frame.state):
+                returned = game.get_score(frame.state)
+                table.store(key, returned)
+                continue
+            frame.moves = frame.state.get_possible_moves()
+            if orderer is not None:
+                frame.moves = orderer.order(frame.state, frame.moves,
+                                            frame.ply)
+        else:
+            score = -1*returned
+            frame.best = max(frame.best, score)
+            frame.alpha = max(frame.alpha, score)
+            if orderer is not None and (frame.alpha >= frame.beta or
+                                        frame.best == frame.state.WIN):
+                orderer.record_cutoff(frame.moves[frame.index - 1],
+                                      frame.ply, len(frame.moves))
+        if frame.alpha < frame.beta and frame.best != frame.state.WIN \
+                and frame.index < len(frame.moves):
+            child = frame.state.make_move(frame.moves[frame.index])
+            frame.index += 1
+            stack.add(frame)
+            stack.add(SearchFrame(child, -frame.beta, -frame.alpha,
+                                  frame.ply + 1))
+            returned = None
+        else:
+            returned = frame.best
+            store_exact(table, frame.state, key, returned,
+                        frame.original_alpha, frame.beta)
+    return returned
+
+
+def lazy_negamax_strategy(game: Any,
+                          table: TranspositionTable = TABLE) -> Any:
+    """
+    Recursively finds the best possible move for the player with
+    lazy_negamax, returning the first move proven to win without
+    generating or searching the moves after it
+    >>> from stonehenge import StonehengeGame
+    >>> game = StonehengeGame(True, 2)
+    >>> lazy_negamax_strategy(game, TranspositionTable(100))
+    'A'
+    """
+    state = game.current_state
+    move = solved_move(SOLVED, state)
+    if move is not None:
+        return move
+    best_move, best_score = None, -INFINITY
+    for move in state.iter_possible_moves():
+        score = -1*lazy_negamax(game, state.make_move(move), table)
+        if score > best_score:
+            best_move, best_score = move, score
+        if best_score == state.WIN:
+            break
+    return best_move
+
+
+def lazy_negamax(game, state, table=TABLE):
+    """
+    Return the exact negamax score of state for the player whose turn it
+    is, taking moves from state.iter_possible_moves() and making each child
+    state only when it is searched, and stopping at the first move that
+    wins. Scores are looked up in and saved to table.
+    >>> from stonehenge import BitboardStonehengeGame
+    >>> game = BitboardStonehengeGame(True, 2)
+    >>> lazy_negamax(game, game.current_state.make_move("A"),
+    ...              TranspositionTable(100))
+    -1
+    """
+    key = state.get_canonical_key()
+    score = table.lookup(key)
+    if score is not None:
+        return score
+    if game.is_over(state):
+        score = game.get_score(state)
+    else:
+        score = -INFINITY
+        for move in state.iter_possible_moves():
+            score = max(score,
+                        -1*lazy_negamax(game, state.make_move(move), table))
+            if score == state.WIN:
+                break
+    table.store(key, score)
+    return score
+
+
+def alphabeta_iterative_strategy(game: Any,
+                                 table: TranspositionTable = TABLE) -> Any:
+    """
+    Iteratively finds the best possible move for the player, using
+    alpha-beta pruning on an explicit stack
+    >>> from stonehenge import StonehengeGame
+    >>> game = StonehengeGame(True, 2)
+    >>> game.current_state = game.current_state.make_move("A")
+    >>> move = alphabeta_iterative_strategy(game, TranspositionTable(1000))
+    >>> move == minimax_recursive_strategy(game, TranspositionTable(1000))
+    True
+    >>> game = StonehengeGame(True, 2)
+    >>> alphabeta_iterative_strategy(game, TranspositionTable(1000))
+    'A'
+    """
+    return alphabeta_move(game, iterative_alphabeta, table, MoveOrderer())
+
+
+def minimax_parallel_strategy(game: Any, workers: int = WORKERS) -> Any:
+    """
+    Finds the best possible move for the player by scoring the moves in
+    separate worker processes, using alpha-beta pruning within each move
+
+    The first move is scored here, and the rest only have to be proven
+    better than it, so nothing is searched when it already wins. Picks the
+    same move as minimax_recursive_strategy: the first move with the best
+    score. Scores are collected in move order, so once a move is known to
+    win the searches of the moves after it are cancelled, and the move is
+    returned as soon as the workers have stopped.
+    >>> from stonehenge import StonehengeGame
+    >>> game = StonehengeGame(True, 2)
+    >>> game.current_state = game.current_state.make_move("A")
+    >>> move = minimax_parallel_strategy(game, 2)
+    >>> move == minimax_recursive_strategy(game, TranspositionTable(1000))
+    True
+    """
+    state = game.current_state
+    move = solved_move(SOLVED, state)
+    if move is not None:
+        return move
+    moves = state.get_possible_moves()
+    if moves == []:
+        return None
+    best_move = moves[0]
+    best_score = score_move(game, state.make_move(best_move), -INFINITY)
+    if best_score == state.WIN:
+        return best_move
+    pool = POOL.get(workers)
+    futures = [pool.submit(score_worker_move, game, state.make_move(move),
+                           best_score) for move in moves[1:]]
+    for move, future in zip(moves[1:], futures):
+        score = future.result()
+        if score > best_score:
+            best_move, best_score = move, score
+        if best_score == state.WIN:
+            POOL.cancel(futures)
+            break
+    return best_move
+
+
+class WorkerPool:
+    """
+    The worker processes of minimax_parallel_strategy, kept between moves
+
+    executor - the ProcessPoolExecutor of the workers, or None until one
+               is needed
+    workers - the number of processes executor has
+    stop_event - the multiprocessing Event that, while set, cancels the
+                 searches of the workers, or None until one is needed; in
+                 a worker, the event of the pool it belongs to
+    """
+    def __init__(self):
+        """
+        Initialize a WorkerPool with no processes started.
+        """
+        self.executor = None
+        self.workers = 0
+        self.stop_event = None
+
+    def get(self, workers):
+        """
+        Return an executor with workers processes, starting one if the
+        kept executor has another number of processes.
+        >>> pool = WorkerPool()
+        >>> pool.get(1) is pool.get(1)
+        True
+        >>> pool.cancel([pool.get(1).submit(abs, -1)])
+        >>> pool.stop_event.is_set()
+        False
+        >>> pool.get(1).submit(abs, -2).result()
+        2
+        >>> pool.get(1).shutdown()
+        """
+        if self.executor is not None and self.workers != workers:
+            self.executor.shutdown()
+            self.executor = None
+        if self.executor is None:
+            self.stop_event = multiprocessing.Event()
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=start_worker,
+                initargs=(self.stop_event,))
+            self.workers = workers
+        return self.executor
+
+    def cancel(self, futures):
+        """
+        Cancel the searches of futures, those already running included, and
+        wait for them to end, so that the workers are free for the next
+        move.
+        """
+        for future in futures:
+            future.cancel()
+        self.stop_event.set()
+        wait(futures)
+        self.stop_event.clear()
+
+
+# The workers minimax_parallel_strategy uses in this process
+POOL = WorkerPool()
+
+
+def start_worker(stop_event):
+    """
+    Set up a new minimax_parallel_strategy worker, whose searches stop
+    while stop_event is set.
+    """
+    POOL.stop_event = stop_event
+
+
+def score_move(game, state, alpha):
     """
+    Return the alpha-beta score of state for the player who moved into it,
+    which is exact if it is above alpha, with this process's own TABLE.
+    """
+    return -1*go_through(game, state, -INFINITY, -alpha, TABLE,
+                         MoveOrderer(), 1)
+
+
+def score_worker_move(game, state, alpha):
+    """
+    Return score_move(game, state, alpha) in a minimax_parallel_strategy
+    worker, or None if the search is cancelled by its pool.
+    """
+    try:
+        return score_move(CancellableGame(game, POOL.stop_event), state,
+                          alpha)
+    except SearchCancelled:
+        return None
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a depth-limited search when its deadline has passed
+    """
+
+
+def iterative_deepening_strategy(game: Any,
+                                 time_limit: float = TIME_LIMIT) -> Any:
+    """
+    Finds the best move for the player that can be found in time_limit
+    seconds, searching one move deeper each time and scoring the positions
+    at the depth limit with rough_outcome()
+
+    The best move found for each position in one iteration is searched
+    first in the next, and the move from the last finished iteration is
+    returned. Stops early once the search reaches the end of the game. A
+    position in one of the SOLVED databases is answered from it at once.
+    >>> from stonehenge import StonehengeGame
+    >>> game = StonehengeGame(True, 2)
+    >>> game.current_state = game.current_state.make_move("D")
+    >>> game.current_state = game.current_state.make_move("B")
+    >>> iterative_deepening_strategy(game, 60.0)
+    'F'
+    """
+    deadline = time.perf_counter() + time_limit
+    state = game.current_state
+    move = solved_move(SOLVED, state)
+    if move is not None:
+        return move
+    moves = state.get_possible_moves()
+    if moves == []:
+        return None
+    best_moves = {}
+    orderer = MoveOrderer()
+    best_move = moves[0]
+    depth = 1
+    while True:
+        try:
+            best_move = depth_limited_move(game, state, depth, deadline,
+                                           best_moves, orderer)[0]
+        except SearchTimeout:
+            break
+        if depth >= len(moves):
+            break
+        depth += 1
+    return best_move
+
+
+def depth_limited_move(game, state, depth, deadline, best_moves, orderer):
+    """
+    Return the best move of state found searching depth moves ahead, and
+    its score, trying first the move that best_moves holds for state and
+    then the rest in the order orderer gives them.
+    """
+    moves = order_by_best_move(
+        state, orderer.order(state, state.get_possible_moves(), 0),
+        best_moves)
+    best_move, best_score = None, -INFINITY
+    for move in moves:
+        score = -1*depth_limited_search(game, state.make_move(move),
+                                        depth - 1, -INFINITY, -best_score,
+                                        deadline, best_moves, orderer, 1)
+        if score > best_score:
+            best_move, best_score = move, score
+        if best_score == state.WIN:
+            break
+    best_moves[state.get_position_key()] = best_move
+    return best_move, best_score
+
+
+def depth_limited_search(game, state, depth, alpha, beta, deadline,
+                         best_moves, orderer, ply):
+    """
+    Return the alpha-beta score of state for the player whose turn it is,
+    looking depth moves ahead and using rough_outcome() past that. Records
+    the best move of each searched position in best_moves, and orders
+    moves as depth_limited_move does.
+
+    Raise SearchTimeout once deadline (a time.perf_counter() value) has
+    passed.
+    >>> from stonehenge import StonehengeGame
+    >>> game = StonehengeGame(True, 2)
+    >>> state = game.current_state.make_move("D").make_move("B")
+    >>> best_moves = {}
+    >>> depth_limited_search(game, state, len(state.get_possible_moves()),
+    ...                      -INFINITY, INFINITY, time.perf_counter() + 60,
+    ...                      best_moves, MoveOrderer(), 0)
+    1
+    >>> best_moves[state.get_position_key()]
+    'F'
+    >>> depth_limited_search(game, state, 1, -INFINITY, INFINITY,
+    ...                      time.perf_counter() - 1, {}, MoveOrderer(), 0)
+    Traceback (most recent call last):
+    ...
+    strategy.SearchTimeout
+    """
+    if time.perf_counter() > deadline:
+        raise SearchTimeout
+    score = TABLE.lookup(state.get_canonical_key())
+    if score is not None:
+        return score
+    if game.is_over(state):
+        return game.get_score(state)
+    if depth <= 0:
+        return state.rough_outcome()
+    best, best_move = -INFINITY, None
+    moves = order_by_best_move(
+        state, orderer.order(state, state.get_possible_moves(), ply),
+        best_moves)
+    for move in moves:
+        score = -1*depth_limited_search(game, state.make_move(move),
+                                        depth - 1, -beta, -alpha, deadline,
+                                        best_moves, orderer, ply + 1)
+        if score > best:
+            best, best_move = score, move
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            orderer.record_cutoff(move, ply, depth)
+            break
+    best_moves[state.get_position_key()] = best_move
+    return best
+
+
+def order_by_best_move(state, moves, best_moves):
+    """
+    Return moves with the move best_moves holds for state, if any, first.
+    """
+    best_move = best_moves.get(state.get_position_key())
+    if best_move in moves:
+        moves = [best_move] + [move for move in moves if move != best_move]
+    return moves
+
+
+def proof_number_strategy(game: Any, budget: int = PN_BUDGET,
+                          table: TranspositionTable = TABLE) -> Any:
+    """
+    Finds a move that wins by force for the player with depth-first
+    proof-number search, expanding at most budget positions, and falls
+    back to rough_outcome_strategy when no win is proven
+
+    Proven wins and losses are saved to table as WIN and LOSE, since
+    Stonehenge cannot be drawn, and the moves are checked in order, so the
+    first move proven to win is returned.
+    >>> from stonehenge import StonehengeGame
+    >>> game = StonehengeGame(True, 2)
+    >>> game.current_state = game.current_state.make_move("D")
+    >>> game.current_state = game.current_state.make_move("B")
+    >>> proof_number_strategy(game, 1000, TranspositionTable(1000))
+    'F'
+    """
+    state = game.current_state
+    move = solved_move(SOLVED, state)
+    if move is not None:
+        return move
+    moves = state.get_possible_moves()
+    if moves == []:
+        return None
+    search = ProofNumberSearch(game, table, budget)
+    try:
+        search.prove(state)
+    except ProofBudgetExceeded:
+        pass
+    for move in moves:
+        if search.numbers(state.make_move(move))[1] == 0:
+            return move
+    return rough_outcome_strategy(game)
+
+
+class ProofBudgetExceeded(Exception):
+    """
+    Raised inside a proof-number search once its budget is spent
+    """
+
+
+class ProofNumberSearch:
+    """
+    A depth-first proof-number (df-pn) search of positions of one game.
+
+    Each position has a proof number, estimating how many positions must
+    be expanded to prove the player to move wins, and a disproof number
+    for proving they lose; a proven win has (0, PN_INFINITY) and a proven
+    loss (PN_INFINITY, 0). The search always expands the position that
+    most cheaply proves or disproves the root, going deeper until the
+    numbers of the position it is in pass the thresholds set by its
+    parent.
 
+    game - the game whose positions are searched
+    table - exact scores, looked up and saved to for proven positions
+    proofs - the proof and disproof numbers of the expanded positions,
+             keyed by get_canonical_key()
+    budget - the positions the search may still expand
+    """
+    def __init__(self, game, table=TABLE, budget=PN_BUDGET):
+        """
+        Initialize a ProofNumberSearch of game, expanding at most budget
+        positions.
+        """
+        self.game = game
+        self.table = table
+        self.proofs = {}
+        self.budget = budget
+
+    def numbers(self, state):
+        """
+        Return the proof and disproof numbers of state, taken from proofs
+        or table, or for a position not yet expanded, 1 and its number of
+        moves. A position with a move that wins at once, which
+        rough_outcome() finds, is proven without being expanded.
+        >>> from stonehenge import StonehengeGame
+        >>> search = ProofNumberSearch(StonehengeGame(True, 2),
+        ...                            TranspositionTable(10))
+        >>> state = search.game.current_state
+        >>> search.numbers(state)
+        (1, 7)
+        >>> won = state.make_move("A").make_move("B")
+        >>> search.numbers(won) == (0, PN_INFINITY)
+        True
+        """
+        key = state.get_canonical_key()
+        found = self.proofs.get(key)
+        if found is not None:
+            return found
+        score = self.table.lookup(key)
+        if score is None and self.game.is_over(state):
+            score = self.game.get_score(state)
+            self.table.store(key, score)
+        if score is None and state.rough_outcome() == state.WIN:
+            score = state.WIN
+            self.table.store(key, score)
+        if score is None:
+            found = 1, len(state.get_possible_moves())
+        elif score == state.WIN:
+            found = 0, PN_INFINITY
+        else:
+            found = PN_INFINITY, 0
+        self.proofs[key] = found
+        return found
+
+    def prove(self, state):
+        """
+        Search state until it is proven won or lost for the player to move,
+        and return its proof and disproof numbers.
+
+        Raise ProofBudgetExceeded if budget runs out first.
+        >>> from stonehenge import StonehengeGame
+        >>> game = StonehengeGame(True, 2)
+        >>> search = ProofNumberSearch(game, TranspositionTable(1000), 1000)
+        >>> search.prove(game.current_state) == (0, PN_INFINITY)
+        True
+        """
+        proof, disproof = self.numbers(state)
+        if proof == 0 or disproof == 0:
+            return proof, disproof
+        return self._search(state, PN_INFINITY, PN_INFINITY)
+
+    def _search(self, state, proof_limit, disproof_limit):
+        """
+        Expand state until its proof number reaches proof_limit or its
+        disproof number reaches disproof_limit, and return both.
+        """
+        if self.budget <= 0:
+            raise ProofBudgetExceeded
+        self.budget -= 1
+        key = state.get_canonical_key()
+        children = [state.make_move(move)
+                    for move in state.get_possible_moves()]
+        while True:
+            numbers = [self.numbers(child) for child in children]
+            # A win for the player to move needs one child lost for the
+            # opponent, and a loss needs every child won for them
+            proof = min(disproof for _, disproof in numbers)
+            disproof = min(sum(proof for proof, _ in numbers), PN_INFINITY)
+            self.proofs[key] = proof, disproof
+            if proof >= proof_limit or disproof >= disproof_limit:
+                break
+            order = sorted(range(len(children)),
+                           key=lambda i: numbers[i][1])
+            best = order[0]
+            second = numbers[order[1]][1] if len(order) > 1 else PN_INFINITY
+            self._search(children[best],
+                         disproof_limit - disproof + numbers[best][0],
+                         min(proof_limit, second + 1))
+        if proof == 0:
+            self.table.store(key, state.WIN)
+        elif disproof == 0:
+            self.table.store(key, state.LOSE)
+        return proof, disproof
+
+
+def minimax_iterative_strategy(game: Any,
+                               table: TranspositionTable = TABLE) -> Any:
+    """
+    Iteratively finds the best possible move for the player
+
+    The top REUSE_PLIES moves of the search tree are kept in MINIMAX_TREE,
+    so when the position is one of its subtrees with every move scored,
+    the move is picked from those scores without searching. The subtree
+    is then grown back to REUSE_PLIES moves, from the scores the last
+    search saved to table, so that the next call finds its position too.
+    >>> from stonehenge import BitboardStonehengeGame
+    >>> solved = dict(SOLVED)
+    >>> SOLVED.clear()
+    >>> game = BitboardStonehengeGame(True, 3)
+    >>> for move in "EDIG":
+    ...     game.current_state = game.current_state.make_move(move)
+    >>> table = TranspositionTable(TABLE_SIZE)
+    >>> MINIMAX_TREE.root = None
+    >>> moves, reused = [], []
+    >>> while not game.is_over(game.current_state):
+    ...     reused.append(MINIMAX_TREE.find(game.current_state) is not None)
+    ...     moves.append(minimax_iterative_strategy(game, table))
+    ...     game.current_state = game.current_state.make_move(moves[-1])
+    >>> "".join(moves), reused
+    ('ABCFH', [False, True, True, True, True])
+    >>> SOLVED.update(solved)
+    """
+    move = solved_move(SOLVED, game.current_state)
+    if move is not None:
+        return move
     moves = game.current_state.get_possible_moves()
-    x = iterative_helper(game)
-    lst = []
-    for i in range(len(x.children)):
-        lst.append(x.children[i].score)
-    for i in range(len(x.children)):
-        if x.children[i].score == -1:
-            return moves[i]
-    for i in range(len(x.children)):
-        if x.children[i].score == 0:
-            return moves[i]
-    for i in range(len(x.children)):
-        if x.children[i].score == 1:
-            return moves[i]
+    x = MINIMAX_TREE.find(game.current_state)
+    if x is None:
+        MINIMAX_TREE.tree = iterative_helper(game, table, REUSE_PLIES)
+    else:
+        MINIMAX_TREE.tree = MINIMAX_TREE.regrow(game, x, table, REUSE_PLIES)
+    MINIMAX_TREE.root = 0
+    tree = MINIMAX_TREE.tree
+    for score in (-1, 0, 1):
+        for i in tree.children(0):
+            if tree.score[i] == score:
+                return moves[tree.move[i]]
     return None
-def iterative_helper(game):
+
+
+class MinimaxTree:
+    """
+    The top of the tree of minimax_iterative_strategy's last search, kept
+    for the next one.
+
+    tree - the ArrayTree of the last search, or None
+    root - the node of tree the last search was from, or None
+    """
+    def __init__(self):
+        """
+        Initialize a MinimaxTree with no tree kept.
+        """
+        self.tree = None
+        self.root = None
+
+    def find(self, state, plies=2):
+        """
+        Return the node of tree with children whose key is that of state, at
+        most plies moves below root, or None if there is none.
+        >>> from stonehenge import StonehengeGame
+        >>> game = StonehengeGame(True, 2)
+        >>> kept = MinimaxTree()
+        >>> kept.tree = iterative_helper(game, TranspositionTable(1000), 3)
+        >>> kept.root = 0
+        >>> state = game.current_state.make_move("D").make_move("B")
+        >>> [kept.tree.score[i] for i in kept.tree.children(kept.find(state))]
+        [1, 1, 1, -1, 1]
+        >>> kept.find(state.make_move("A").make_move("C")) is None
+        True
+        """
+        if self.tree is None or self.root is None:
+            return None
+        tree, key = self.tree, state_key(state)
+        level = [self.root]
+        for depth in range(plies + 1):
+            below = []
+            for node in level:
+                if tree.child_count[node] and tree.key[node] == key:
+                    return node
+                if depth < plies:
+                    below.extend(tree.children(node))
+            level = below
+        return None
+
+    def regrow(self, game, node, table=TABLE, keep_plies=1):
+        """
+        Return an ArrayTree of node of tree, whose state is
+        game.current_state, and its descendants, in which every position
+        fewer than keep_plies moves below node has its children. The
+        positions missing are found with iterative_helper(), which looks
+        the scores of those keep_plies moves below up in table.
+        >>> from stonehenge import StonehengeGame
+        >>> game = StonehengeGame(True, 2)
+        >>> table = TranspositionTable(1000)
+        >>> kept = MinimaxTree()
+        >>> kept.tree = iterative_helper(game, table, 3)
+        >>> kept.root = 0
+        >>> game.current_state = game.current_state.make_move("D")
+        >>> game.current_state = game.current_state.make_move("B")
+        >>> node = kept.find(game.current_state)
+        >>> tree = kept.regrow(game, node, table, 3)
+        >>> fresh = iterative_helper(game, TranspositionTable(1000), 3)
+        >>> len(tree) == len(fresh)
+        True
+        >>> [tree.score[i] for i in tree.children(0)]
+        [1, 1, 1, -1, 1]
+        """
+        tree = ArrayTree()
+        tree.add(-1, 0, self.tree.key[node], self.tree.score[node])
+        stack = Stack()
+        stack.add((node, 0, game.current_state, 0))
+        while not stack.is_empty():
+            old, new, state, depth = stack.remove()
+            if depth >= keep_plies:
+                continue
+            if self.tree.child_count[old] == 0:
+                tree.graft(new, iterative_helper(game, table,
+                                                 keep_plies - depth, state))
+                continue
+            moves = state.get_possible_moves()
+            for i in self.tree.children(old):
+                child = tree.add(new, self.tree.move[i], self.tree.key[i],
+                                 self.tree.score[i])
+                stack.add((i, child, state.make_move(moves[self.tree.move[i]]),
+                           depth + 1))
+        return tree
+
+
+# Moves below the root of minimax_iterative_strategy's search whose nodes
+# are kept for its next call, which is two moves later
+REUSE_PLIES = 3
+# The tree minimax_iterative_strategy keeps between moves in this process
+MINIMAX_TREE = MinimaxTree()
+
+
+def iterative_helper(game, table=TABLE, keep_plies=1, state=None):
     """
-    Finds the best possible moves through a stack and a tree
+    Finds the best possible moves of state, by default game.current_state,
+    through a stack and a tree, returning an ArrayTree whose root, node 0,
+    has a scored child for each move
+
+    The states of the nodes not yet scored are kept by node. Once a node's
+    score is folded into its parent's, the parent's children are pruned
+    unless it is fewer than keep_plies moves below the root; since the
+    search is depth-first they are the last nodes added, so only the
+    positions along the path being searched, their siblings and the top
+    of the tree are kept. Below the top, children whose score is already
+    in table are not expanded; every position in the top is, so that the
+    kept nodes have their children. Every newly scored position is saved
+    to table.
+    >>> from stonehenge import StonehengeGame
+    >>> tree = iterative_helper(StonehengeGame(True, 1))
+    >>> [tree.score[i] for i in tree.children(0)]
+    [-1, -1, -1]
+    >>> len(tree)
+    4
     """
-    new_game = copy.deepcopy(game)
+    if state is None:
+        state = game.current_state
     stack = Stack()
-    first_item = Tree(new_game)
-    first_item.is_p1_turn = True
-    stack.add(first_item)
-    last_item = 0
+    tree = ArrayTree()
+    states = {tree.add(-1, 0, state_key(state)): state}
+    stack.add((0, 0))
     while not stack.is_empty():
-        item = stack.remove()
-        last_item = item
-        if item.children != []:
-            item.score = max([i.score*-1 for i in item.children])
-        if item.value.is_over(item.value.current_state):
-            if item.value.is_winner\
-                        (item.value.current_state.get_current_player_name()):
-                item.score = item.value.current_state.WIN
-            elif not item.value.is_winner\
-                        (item.value.current_state.get_current_player_name()):
-                item.score = item.value.current_state.LOSE
-            else:
-                item.score = item.value.current_state.DRAW
-        elif item.children == []:
-            temp = []
-            for i in item.value.current_state.get_possible_moves():
-                state = item.value.current_state.make_move(i)
-                new_game1 = copy.deepcopy(item.value)
-                new_game1.current_state = state
-                state = Tree(new_game1)
-                temp.append(state)
-            item.children = temp
-            stack.add(item)
-            for i in temp:
-                stack.add(i)
-    return last_item
-
-# TODO: Implement an iterative version of the minimax strategy.
+        item, depth = stack.remove()
+        if tree.child_count[item]:
+            score = max([tree.score[i]*-1 for i in tree.children(item)])
+            tree.score[item] = score
+            table.store(states[item].get_canonical_key(), score)
+            if item != 0:
+                del states[item]
+                if depth >= keep_plies:
+                    tree.prune(item)
+        elif game.is_over(states[item]):
+            score = game.get_score(states[item])
+            tree.score[item] = score
+            table.store(states[item].get_canonical_key(), score)
+            if item != 0:
+                del states[item]
+        else:
+            for index, i in enumerate(states[item].get_possible_moves()):
+                new_state = states[item].make_move(i)
+                score = None
+                if depth + 1 >= keep_plies:
+                    score = table.lookup(new_state.get_canonical_key())
+                child = tree.add(item, index, state_key(new_state), score)
+                if score is None:
+                    states[child] = new_state
+            stack.add((item, depth))
+            for i in tree.children(item):
+                if tree.score[i] == UNSCORED:
+                    stack.add((i, depth + 1))
+    return tree
+
 
 if __name__ == "__main__":
     from python_ta import check_all
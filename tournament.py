@@ -0,0 +1,127 @@
+"""
+Matches between two strategies, played without game_interface's prompts
+
+Run "python tournament.py mr ro --games 20 --size 3" to have mr play p1
+and ro play p2 in 20 games of Stonehenge on a size-3 board. The games are
+spread over worker processes, and a JSON summary of the results and of
+how long each player took per move is printed.
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+from registry import STRATEGIES
+from stonehenge import StonehengeGame, BitboardStonehengeGame
+from strategy import WORKERS
+
+# The games of game_interface.playable_games that a tournament can play
+GAMES = {'h': StonehengeGame, 'b': BitboardStonehengeGame}
+# The percentiles of the per-move latencies that are reported
+PERCENTILES = (50, 90, 99)
+
+
+def play_game(p1: str, p2: str, game_key: str, board_size: int,
+              p1_starts: bool) -> Tuple[str, Dict[str, List[float]]]:
+    """
+    Play one game of GAMES[game_key] on a board_size board, with the
+    strategies named p1 and p2 in STRATEGIES. Return the winner ('p1',
+    'p2' or 'draw') and the seconds each player took for each of its
+    moves.
+    >>> winner, latencies = play_game('mr', 'ro', 'b', 1, True)
+    >>> winner, len(latencies['p1']), len(latencies['p2'])
+    ('p1', 1, 0)
+    """
+    game = GAMES[game_key](p1_starts, board_size)
+    strategies = {'p1': STRATEGIES[p1], 'p2': STRATEGIES[p2]}
+    latencies = {'p1': [], 'p2': []}
+    state = game.current_state
+    while not game.is_over(state):
+        player = state.get_current_player_name()
+        start = time.perf_counter()
+        move = strategies[player](game)
+        latencies[player].append(time.perf_counter() - start)
+        if not state.is_valid_move(move):
+            raise ValueError("{} made the invalid move {}".format(
+                player, move))
+        state = state.make_move(move)
+        game.current_state = state
+    for player in ('p1', 'p2'):
+        if game.is_winner(player):
+            return player, latencies
+    return 'draw', latencies
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Return the nearest-rank percent percentile of values, or None if
+    there are none.
+    >>> percentile([4, 1, 3, 2], 50)
+    2
+    >>> percentile([4, 1, 3, 2], 99)
+    4
+    >>> percentile([], 50) is None
+    True
+    """
+    if values == []:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered)*percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def run_tournament(p1: str, p2: str, games: int, board_size: int,
+                   p1_starts: bool = True, game_key: str = 'b',
+                   workers: int = WORKERS) -> Dict[str, Any]:
+    """
+    Play games games between the strategies named p1 and p2 over workers
+    processes, and return the share of games won by each player and
+    drawn, and the percentiles in PERCENTILES and the maximum of each
+    player's per-move latency in seconds.
+    >>> summary = run_tournament('mr', 'ro', 3, 2, workers=1)
+    >>> summary['p1_wins'], summary['p2_wins'], summary['draws']
+    (1.0, 0.0, 0.0)
+    >>> summary['p1_moves'], summary['p2_moves']
+    (12, 9)
+    """
+    args = ([p1] * games, [p2] * games, [game_key] * games,
+            [board_size] * games, [p1_starts] * games)
+    if workers <= 1 or games <= 1:
+        results = list(map(play_game, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(play_game, *args))
+    winners = [winner for winner, _ in results]
+    summary = {"p1": p1, "p2": p2, "game": GAMES[game_key].__name__,
+               "board_size": board_size, "p1_starts": p1_starts,
+               "games": games}
+    for outcome, name in (('p1', 'p1_wins'), ('p2', 'p2_wins'),
+                          ('draw', 'draws')):
+        summary[name] = winners.count(outcome) / games if games else 0.0
+    for player in ('p1', 'p2'):
+        latencies = [seconds for _, times in results
+                     for seconds in times[player]]
+        summary[player + "_moves"] = len(latencies)
+        for percent in PERCENTILES:
+            summary["{}_p{}_seconds".format(player, percent)] = \
+                percentile(latencies, percent)
+        summary[player + "_max_seconds"] = max(latencies, default=None)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("p1", choices=list(STRATEGIES))
+    parser.add_argument("p2", choices=list(STRATEGIES))
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--size", type=int, default=2,
+                        help="board size (default: 2)")
+    parser.add_argument("--p2-starts", action="store_true",
+                        help="have p2 make the first move")
+    parser.add_argument("--game", choices=list(GAMES), default='b')
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    arguments = parser.parse_args()
+    print(json.dumps(run_tournament(arguments.p1, arguments.p2,
+                                    arguments.games, arguments.size,
+                                    not arguments.p2_starts, arguments.game,
+                                    arguments.workers), indent=2))
@@ -0,0 +1,86 @@
+"""
+A bounded transposition table shared by the minimax strategies
+"""
+from collections import OrderedDict
+from typing import Any
+
+
+class TranspositionTable:
+    """
+    Maps exact position keys to the score of that position for the player
+    whose turn it is. Once max_size entries are stored, the least recently
+    used entry is evicted to make room for a new one.
+    """
+    def __init__(self, max_size: int = 200000) -> None:
+        """
+        Initialize an empty TranspositionTable holding at most max_size
+        entries.
+        >>> table = TranspositionTable(10)
+        >>> len(table)
+        0
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        """
+        Return the number of stored entries.
+        """
+        return len(self._entries)
+
+    def __contains__(self, key: Any) -> bool:
+        """
+        Return whether key has an entry in this table.
+        >>> table = TranspositionTable(10)
+        >>> table.store('A', 1)
+        >>> 'A' in table
+        True
+        """
+        return key in self._entries
+
+    def lookup(self, key: Any) -> Any:
+        """
+        Return the value stored for key, or None if there is none. A hit
+        marks the entry as recently used.
+        >>> table = TranspositionTable(10)
+        >>> table.lookup('A') is None
+        True
+        >>> table.store('A', -1)
+        >>> table.lookup('A')
+        -1
+        """
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def store(self, key: Any, value: Any) -> None:
+        """
+        Store value for key, evicting the least recently used entry if the
+        table is full.
+        >>> table = TranspositionTable(2)
+        >>> table.store('A', 1)
+        >>> table.store('B', 0)
+        >>> _ = table.lookup('A')
+        >>> table.store('C', -1)
+        >>> 'B' in table
+        False
+        >>> len(table)
+        2
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        elif len(self._entries) >= self.max_size:
+            self._entries.popitem(last=False)
+        self._entries[key] = value
+
+    def clear(self) -> None:
+        """
+        Remove every entry from this table.
+        """
+        self._entries.clear()
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")